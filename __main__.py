@@ -0,0 +1,27 @@
+import argparse
+
+from .server import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m npmrd_data_exchange")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run a long-lived worker answering JSON-lines requests "
+        "(standardize / validate / convert / align)",
+    )
+    serve_parser.add_argument(
+        "--socket",
+        dest="socket_path",
+        help="Listen on this Unix socket instead of stdin / stdout",
+    )
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.socket_path)
+
+
+if __name__ == "__main__":
+    main()
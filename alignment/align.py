@@ -1,6 +1,14 @@
-from rdkit import Chem
-from rdkit.Chem import AllChem, rdDepictor, inchi
-from typing import List, Dict, Optional, Tuple
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
+
+# RDKit takes a noticeable time to import, so it is only imported by the methods that
+# need it (the first MolBlockAligner pays for it, not every importer of this module)
+if TYPE_CHECKING:
+    from rdkit import Chem
+
+# Atom mapping engines of MolBlockAligner (see get_mol1_to_mol2_index_map)
+MAPPING_METHODS = ("canonical", "substructure")
 
 
 class MolBlockAligner:
@@ -16,12 +24,25 @@ class MolBlockAligner:
         2. Creating a topology-based atom index mapping (mol1 → mol2).
         3. Aligning NMR shift data to the new index mapping.
         4. Returning the aligned C and H shift lists.
+
+    mapping_method picks how the atom index mapping is built (see MAPPING_METHODS)...
+        canonical: pair atoms by RDKit canonical atom rank, verified bond by bond and
+            falling back to substructure matching if the pairing is not a valid match
+        substructure: substructure match of the two molecules (can take very long for
+            highly symmetric molecules)
+    The method that produced the mapping is kept in self.mapping_method_used.
     """
 
-    def __init__(self, curation_mol_block: str, db_mol_block: str):
+    def __init__(self, curation_mol_block: str, db_mol_block: str, mapping_method: str = "canonical"):
         """Initialize by loading and verifying both MOL blocks."""
+        if mapping_method not in MAPPING_METHODS:
+            raise ValueError(
+                f"Unknown mapping_method '{mapping_method}', expected one of {MAPPING_METHODS}"
+            )
         self.curation_mol_block = curation_mol_block
         self.db_mol_block = db_mol_block
+        self.mapping_method = mapping_method
+        self.mapping_method_used = None
 
         self.curation_mol = self._load_mol_block(curation_mol_block, label="curation_mol_block")
         self.db_mol = self._load_mol_block(db_mol_block, label="db_mol_block")
@@ -33,9 +54,9 @@ class MolBlockAligner:
         # Verify that both mol block align with the same structure
         self._confirm_inchikeys_match()
 
-        # Create deterministic 3D coordinates for reproducibility
-        AllChem.EmbedMolecule(self.curation_mol, AllChem.ETKDG())
-        AllChem.EmbedMolecule(self.db_mol, AllChem.ETKDG())
+        # 3D coordinates are not needed for the (2D topology based) index map, so the
+        # molecules are only embedded if a caller asks for them (see embed_3d)
+        self._embedded_3d = False
 
         # Build mapping between the two molecules (mol1 → mol2)
         self.mol1_to_mol2 = self._create_index_map()
@@ -45,6 +66,8 @@ class MolBlockAligner:
     # -------------------------------------------------------------------------
     def _load_mol_block(self, mol_block: str, label: str) -> Chem.Mol:
         """Convert MOL block string to RDKit Mol object."""
+        from rdkit import Chem
+
         mol = Chem.MolFromMolBlock(mol_block, removeHs=False)
         if mol is None:
             raise ValueError(f"Error: Unable to parse MOL block for {label}.")
@@ -61,10 +84,19 @@ class MolBlockAligner:
 
     def _create_index_map(self) -> Dict[int, int]:
         """Wrapper for get_mol1_to_mol2_index_map logic."""
+        if self.mapping_method == "canonical":
+            mol1_to_mol2 = self.get_canonical_rank_index_map(self.curation_mol, self.db_mol)
+            if mol1_to_mol2 is not None:
+                self.mapping_method_used = "canonical"
+                return mol1_to_mol2
+            print("[INFO] Canonical rank mapping could not be verified, using substructure matching...")
+        self.mapping_method_used = "substructure"
         return self.get_mol1_to_mol2_index_map(self.curation_mol, self.db_mol)
 
     def _confirm_inchikeys_match(self):
         """Confirm inchikey result from both mol blocks is the same"""
+        from rdkit.Chem import inchi
+
         inchikey_curation = inchi.MolToInchiKey(self.curation_mol)
         inchikey_db = inchi.MolToInchiKey(self.db_mol)
         if inchikey_curation != inchikey_db:
@@ -74,6 +106,33 @@ class MolBlockAligner:
                 f"  db_mol InChIKey: {inchikey_db}"
             )
 
+    # -------------------------------------------------------------------------
+    # 3D COORDINATES (only generated on request)
+    # -------------------------------------------------------------------------
+    def embed_3d(self, random_seed: int = -1) -> Tuple[Chem.Mol, Chem.Mol]:
+        """
+        Embed both molecules in 3D with ETKDG the first time it is called and return
+        them as (curation_mol, db_mol). Embedding is stochastic unless random_seed is
+        given and can be slow (or fail) for large strained ring systems, which is why it
+        is not part of the alignment itself.
+
+        Raises:
+            ValueError: if a molecule could not be embedded.
+        """
+        if not self._embedded_3d:
+            from rdkit.Chem import AllChem
+
+            for mol, label in [
+                (self.curation_mol, "curation_mol_block"),
+                (self.db_mol, "db_mol_block"),
+            ]:
+                params = AllChem.ETKDG()
+                params.randomSeed = random_seed
+                if AllChem.EmbedMolecule(mol, params) == -1:
+                    raise ValueError(f"Error: Unable to embed {label} in 3D.")
+            self._embedded_3d = True
+        return self.curation_mol, self.db_mol
+
     # -------------------------------------------------------------------------
     # CORE MAPPING FUNCTION (original logic preserved)
     # -------------------------------------------------------------------------
@@ -141,6 +200,9 @@ class MolBlockAligner:
                     but with numbering starting from **1** (human-readable).
                     Example: `{1: 1, 2: 2, 3: 3, ...}`
         """
+        from rdkit import Chem
+        from rdkit.Chem import rdDepictor
+
         mol1_copy = Chem.AddHs(Chem.Mol(mol1))
         mol2_copy = Chem.AddHs(Chem.Mol(mol2))
 
@@ -155,6 +217,92 @@ class MolBlockAligner:
 
         return {mol1_idx + 1: mol2_idx + 1 for mol1_idx, mol2_idx in enumerate(substruct_match)}
 
+    # -------------------------------------------------------------------------
+    # CANONICAL RANK MAPPING
+    # -------------------------------------------------------------------------
+    def get_canonical_rank_index_map(self, mol1: Chem.Mol, mol2: Chem.Mol) -> Optional[Dict[int, int]]:
+        """
+        Generate the same 1-based atom index mapping (mol1 -> mol2) as
+        get_mol1_to_mol2_index_map by pairing the atoms of both molecules (with
+        hydrogens added) that get the same RDKit canonical atom rank. Ranking is close
+        to linear in the number of atoms, unlike substructure matching whose
+        backtracking can explode for symmetric molecules (i.e. sugars and polyketides
+        with many equivalent hydrogens).
+
+        Symmetry-equivalent atoms (see get_symmetry_classes) tie on their rank and the
+        ties are broken canonically, so they are paired one-to-one within their class.
+        As any such pairing is equally valid, it can differ from the one substructure
+        matching picks for those atoms only.
+
+        The pairing is verified (elements, charges, isotopes and every bond with its
+        type) before being returned.
+
+        Returns:
+            dict: mapping of mol1 atom indices -> mol2 atom indices (starting from 1),
+            or None if the pairing could not be verified (the caller should then fall
+            back to get_mol1_to_mol2_index_map).
+        """
+        from rdkit import Chem
+
+        mol1_copy = Chem.AddHs(Chem.Mol(mol1))
+        mol2_copy = Chem.AddHs(Chem.Mol(mol2))
+        if (
+            mol1_copy.GetNumAtoms() != mol2_copy.GetNumAtoms()
+            or mol1_copy.GetNumBonds() != mol2_copy.GetNumBonds()
+        ):
+            return None
+
+        mol2_index_by_rank = {
+            rank: mol2_idx
+            for mol2_idx, rank in enumerate(Chem.CanonicalRankAtoms(mol2_copy, breakTies=True))
+        }
+        mol1_to_mol2 = [
+            mol2_index_by_rank[rank]
+            for rank in Chem.CanonicalRankAtoms(mol1_copy, breakTies=True)
+        ]
+
+        if not self._is_valid_atom_map(mol1_copy, mol2_copy, mol1_to_mol2):
+            return None
+        return {mol1_idx + 1: mol2_idx + 1 for mol1_idx, mol2_idx in enumerate(mol1_to_mol2)}
+
+    @staticmethod
+    def _is_valid_atom_map(mol1: Chem.Mol, mol2: Chem.Mol, mol1_to_mol2: List[int]) -> bool:
+        """True if the 0-based mol1_to_mol2 maps every atom and bond of mol1 onto mol2."""
+        for atom1 in mol1.GetAtoms():
+            atom2 = mol2.GetAtomWithIdx(mol1_to_mol2[atom1.GetIdx()])
+            if (
+                atom1.GetAtomicNum() != atom2.GetAtomicNum()
+                or atom1.GetFormalCharge() != atom2.GetFormalCharge()
+                or atom1.GetIsotope() != atom2.GetIsotope()
+            ):
+                return False
+        for bond1 in mol1.GetBonds():
+            bond2 = mol2.GetBondBetweenAtoms(
+                mol1_to_mol2[bond1.GetBeginAtomIdx()], mol1_to_mol2[bond1.GetEndAtomIdx()]
+            )
+            if bond2 is None or bond2.GetBondType() != bond1.GetBondType():
+                return False
+        return True
+
+    def get_symmetry_classes(self, mol: Optional[Chem.Mol] = None) -> List[List[int]]:
+        """
+        Group the symmetry-equivalent atoms of mol (the curation molecule by default,
+        with hydrogens added) by their canonical rank without tie breaking, i.e. the
+        three hydrogens of a methyl group. Equivalent atoms are interchangeable in the
+        index mapping.
+
+        Returns:
+            list: one list per class of more than one atom, holding the 1-based atom
+            indices of the class (ordered by index).
+        """
+        from rdkit import Chem
+
+        mol = Chem.AddHs(Chem.Mol(self.curation_mol if mol is None else mol))
+        classes: Dict[int, List[int]] = {}
+        for idx, rank in enumerate(Chem.CanonicalRankAtoms(mol, breakTies=False)):
+            classes.setdefault(rank, []).append(idx + 1)
+        return [atom_indices for atom_indices in classes.values() if len(atom_indices) > 1]
+
     # -------------------------------------------------------------------------
     # CORE SHIFT ALIGNMENT FUNCTION (original logic preserved)
     # -------------------------------------------------------------------------
@@ -165,7 +313,8 @@ class MolBlockAligner:
     ) -> List[Dict]:
         """
         Remap the RDKit atom indices in NMR shift lists according to a 1-based
-        atom index mapping derived from `get_mol1_to_mol2_index_map`.
+        atom index mapping derived from `get_canonical_rank_index_map` or
+        `get_mol1_to_mol2_index_map`.
         """
         mol1_to_mol2 = self.mol1_to_mol2
         remapped_shifts = []
@@ -0,0 +1,113 @@
+import unittest
+import os
+import sys
+import io
+import json
+import random
+from contextlib import redirect_stdout
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from rdkit import Chem
+from alignment.align import MolBlockAligner
+
+class TestMolBlockAligner(unittest.TestCase):
+
+    def setUp(self):
+        curator_json_path = os.path.join(
+            os.path.dirname(__file__), '..', 'npmrd_curator_23d8da7e-03e7-4dc6-91ae-4dbc91213de2.json'
+        )
+        with open(curator_json_path, 'r') as file:
+            self.curator_json = json.load(file)
+
+    def renumbered_mol_block(self, mol_block, seed=0):
+        """Returns mol_block with its atoms shuffled and the new -> old index permutation."""
+        mol = Chem.MolFromMolBlock(mol_block, removeHs=False)
+        new_to_old = list(range(mol.GetNumAtoms()))
+        random.Random(seed).shuffle(new_to_old)
+        return Chem.MolToMolBlock(Chem.RenumberAtoms(mol, new_to_old)), new_to_old
+
+    def make_aligner(self, curation_mol_block, db_mol_block, mapping_method="canonical"):
+        with redirect_stdout(io.StringIO()):
+            return MolBlockAligner(curation_mol_block, db_mol_block, mapping_method)
+
+    def test_index_map_follows_renumbered_atoms(self):
+        mol_block = self.curator_json[0]["canonicalized_mol_block"]
+        db_mol_block, new_to_old = self.renumbered_mol_block(mol_block)
+        aligner = self.make_aligner(mol_block, db_mol_block)
+
+        curation_mol = Chem.MolFromMolBlock(mol_block, removeHs=False)
+        db_mol = Chem.MolFromMolBlock(db_mol_block, removeHs=False)
+        self.assertEqual(len(aligner.mol1_to_mol2), curation_mol.GetNumAtoms())
+        for curation_index, db_index in aligner.mol1_to_mol2.items():
+            curation_atom = curation_mol.GetAtomWithIdx(curation_index - 1)
+            db_atom = db_mol.GetAtomWithIdx(db_index - 1)
+            self.assertEqual(curation_atom.GetSymbol(), db_atom.GetSymbol())
+            self.assertEqual(curation_atom.GetDegree(), db_atom.GetDegree())
+
+        with redirect_stdout(io.StringIO()):
+            c_aligned, h_aligned = aligner.align(
+                [{"rdkit_index": 1, "shift": 23.5}], [{"rdkit_index": [1], "shift": 1.25}]
+            )
+        self.assertEqual(c_aligned, [{"rdkit_index": aligner.mol1_to_mol2[1], "shift": 23.5}])
+        self.assertEqual(h_aligned, [{"rdkit_index": aligner.mol1_to_mol2[1], "shift": 1.25}])
+
+    def test_mapping_methods_agree_up_to_symmetry(self):
+        for entry in self.curator_json:
+            mol_block = entry["canonicalized_mol_block"]
+            db_mol_block, _ = self.renumbered_mol_block(mol_block, seed=1)
+            canonical = self.make_aligner(mol_block, db_mol_block, "canonical")
+            substructure = self.make_aligner(mol_block, db_mol_block, "substructure")
+            self.assertEqual(canonical.mapping_method_used, "canonical")
+            self.assertEqual(substructure.mapping_method_used, "substructure")
+
+            # Atoms may only be mapped differently if they are symmetry-equivalent
+            db_classes = {}
+            for symmetry_class in canonical.get_symmetry_classes(canonical.db_mol):
+                for atom_index in symmetry_class:
+                    db_classes[atom_index] = symmetry_class[0]
+            for curation_index, db_index in canonical.mol1_to_mol2.items():
+                other_db_index = substructure.mol1_to_mol2[curation_index]
+                self.assertEqual(db_classes.get(db_index, db_index), db_classes.get(other_db_index, other_db_index))
+
+    def test_canonical_mapping_falls_back_to_substructure(self):
+        mol_block = self.curator_json[0]["canonicalized_mol_block"]
+        expected = self.make_aligner(mol_block, mol_block, "substructure").mol1_to_mol2
+        with mock.patch.object(MolBlockAligner, "_is_valid_atom_map", return_value=False):
+            aligner = self.make_aligner(mol_block, mol_block)
+        self.assertEqual(aligner.mapping_method_used, "substructure")
+        self.assertEqual(aligner.mol1_to_mol2, expected)
+
+        with self.assertRaises(ValueError):
+            self.make_aligner(mol_block, mol_block, "unknown")
+
+    def test_symmetry_classes(self):
+        # 2,2-dimethylpropane: 4 equivalent methyl carbons and 12 equivalent hydrogens
+        mol = Chem.AddHs(Chem.MolFromSmiles("CC(C)(C)C"))
+        mol_block = Chem.MolToMolBlock(mol)
+        aligner = self.make_aligner(mol_block, mol_block)
+        self.assertEqual(sorted(len(symmetry_class) for symmetry_class in aligner.get_symmetry_classes()), [4, 12])
+
+    def test_3d_embedding_is_lazy(self):
+        mol_block = self.curator_json[0]["canonicalized_mol_block"]
+        aligner = self.make_aligner(mol_block, mol_block)
+        self.assertFalse(aligner._embedded_3d)
+        coordinates_before = aligner.curation_mol.GetConformer().GetPositions().tolist()
+
+        curation_mol, db_mol = aligner.embed_3d(random_seed=42)
+
+        self.assertTrue(aligner._embedded_3d)
+        self.assertIs(curation_mol, aligner.curation_mol)
+        self.assertTrue(db_mol.GetConformer().Is3D())
+        self.assertNotEqual(curation_mol.GetConformer().GetPositions().tolist(), coordinates_before)
+
+    def test_mismatched_structures_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.make_aligner(
+                self.curator_json[0]["canonicalized_mol_block"],
+                self.curator_json[1]["canonicalized_mol_block"],
+            )
+
+if __name__ == "__main__":
+    unittest.main()
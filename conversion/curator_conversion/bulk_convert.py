@@ -0,0 +1,304 @@
+# Run (from the "npmrd_data_exchange" repo) using i.e. this command...
+# python -m conversion.curator_conversion.bulk_convert "curator_backup/*.json" -o exchange_jsons --workers 8
+
+import argparse
+import glob
+import os
+import sys
+import time
+import traceback
+
+try:
+    from ... import json_io
+    from .npmrd_curator_converter import CuratorConverter
+except ImportError:
+    # Imported with the repo root on sys.path
+    import json_io
+    from conversion.curator_conversion.npmrd_curator_converter import CuratorConverter
+
+# Written to the output directory unless other paths are given
+MANIFEST_FILE_NAME = "bulk_convert_manifest.jsonl"
+SUMMARY_FILE_NAME = "bulk_convert_summary.json"
+OUTPUT_PREFIX = "exchange_"
+
+
+def find_input_files(inputs):
+    """
+    Expands input directories (every .json file directly inside them), glob patterns and
+    file paths into a list of absolute file paths, in order and without duplicates.
+    """
+    input_files = []
+    seen = set()
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            matches = glob.glob(os.path.join(input_path, "*.json"))
+        else:
+            matches = glob.glob(input_path, recursive=True)
+        for match in sorted(matches):
+            match = os.path.abspath(match)
+            if os.path.isfile(match) and match not in seen:
+                seen.add(match)
+                input_files.append(match)
+    return input_files
+
+
+def get_output_path(input_path, output_dir, prefix=OUTPUT_PREFIX):
+    return os.path.join(output_dir, prefix + os.path.basename(input_path))
+
+
+def convert_file(input_path, output_path, validate=True, pretty=True):
+    """
+    Converts one curator JSON file and writes the exchange JSON to output_path.
+
+    Returns:
+        dict: record of the file with the fields...
+            input, output (str): the file paths
+            session_uuid, doi (str): from the final status of the conversion
+            entries (int): number of curator entries
+            converted (int): number of entries converted (peak lists are skipped)
+            invalid_entries (int): converted entries failing schema validation
+            valid (bool): the "valid" field of the final status (None if validate is False)
+            no_c_nmr, no_h_nmr, peak_list_only (bool): the "entries_with_..." fields
+                of the final status
+            seconds (float): time taken to load, convert and write the file
+            error (str): the traceback if the conversion failed (then only input,
+                output and seconds are also present)
+    """
+    start = time.perf_counter()
+    record = {"input": input_path, "output": output_path}
+    try:
+        curator_json_dict = json_io.load_file(input_path)
+        curator_converter = CuratorConverter(curator_json_dict)
+
+        exchange_json_list = []
+        invalid_entries = 0
+        for exchange_json, entry_status in curator_converter.iter_convert_json(validate):
+            if exchange_json is not None:
+                exchange_json_list.append(exchange_json)
+            if entry_status["valid"] is False:
+                invalid_entries += 1
+        json_io.dump_file(exchange_json_list, output_path, pretty=pretty)
+
+        final_status_dict = curator_converter.final_status_dict
+        record.update({
+            "session_uuid": final_status_dict["session_uuid"],
+            "doi": final_status_dict["doi"],
+            "entries": len(curator_json_dict),
+            "converted": len(exchange_json_list),
+            "invalid_entries": invalid_entries,
+            "valid": final_status_dict["valid"],
+            "no_c_nmr": final_status_dict["entries_with_no_c_nmr"],
+            "no_h_nmr": final_status_dict["entries_with_no_h_nmr"],
+            "peak_list_only": final_status_dict["entries_with_peak_list_only"],
+        })
+    except Exception:
+        record["error"] = traceback.format_exc()
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def _convert_task(task):
+    return convert_file(*task)
+
+
+def load_manifest(manifest_path):
+    """
+    Returns the records of the files already converted, keyed by input path, from a
+    manifest written by bulk_convert. Records of failed files and files whose output
+    no longer exists are left out so they are converted again.
+    """
+    completed = {}
+    if not os.path.exists(manifest_path):
+        return completed
+    with open(manifest_path, "rb") as manifest_file:
+        for line in manifest_file:
+            if not line.strip():
+                continue
+            try:
+                record = json_io.loads(line)
+            except json_io.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if "error" not in record and os.path.exists(record["output"]):
+                completed[record["input"]] = record
+    return completed
+
+
+def summarize_records(records, elapsed_seconds):
+    """
+    Summarizes the records of every input file (see convert_file). Records taken from
+    the manifest of an earlier run are marked with "resumed".
+
+    Returns:
+        dict: summary with the fields...
+            files, converted_files, resumed_files, failed_files (int): file counts
+            entries, converted_entries, invalid_entries (int): entry counts
+            no_c_nmr, no_h_nmr, peak_list_only, invalid (list): input files with
+                entries without C NMR, without H NMR, holding peak lists only or
+                failing schema validation
+            failed (list): {"input", "error"} of the files that could not be converted
+            elapsed_seconds, files_per_second, entries_per_second (float): throughput
+                of this run (files resumed from the manifest are not counted)
+            per_file (list): the record of every file, in input order
+    """
+    converted = [record for record in records if "error" not in record]
+    resumed = [record for record in converted if record.get("resumed")]
+    run_records = [record for record in records if not record.get("resumed")]
+    run_entries = sum(record.get("entries", 0) for record in run_records)
+
+    def throughput(count):
+        return round(count / elapsed_seconds, 3) if elapsed_seconds else None
+
+    return {
+        "files": len(records),
+        "converted_files": len(converted) - len(resumed),
+        "resumed_files": len(resumed),
+        "failed_files": len(records) - len(converted),
+        "entries": sum(record["entries"] for record in converted),
+        "converted_entries": sum(record["converted"] for record in converted),
+        "invalid_entries": sum(record["invalid_entries"] for record in converted),
+        "no_c_nmr": [record["input"] for record in converted if record["no_c_nmr"]],
+        "no_h_nmr": [record["input"] for record in converted if record["no_h_nmr"]],
+        "peak_list_only": [record["input"] for record in converted if record["peak_list_only"]],
+        "invalid": [record["input"] for record in converted if record["invalid_entries"]],
+        "failed": [
+            {"input": record["input"], "error": record["error"]}
+            for record in records if "error" in record
+        ],
+        "elapsed_seconds": round(elapsed_seconds, 6),
+        "files_per_second": throughput(len(run_records)),
+        "entries_per_second": throughput(run_entries),
+        "per_file": records,
+    }
+
+
+def bulk_convert(
+    inputs,
+    output_dir,
+    workers=None,
+    resume=True,
+    manifest_path=None,
+    summary_path=None,
+    validate=True,
+    pretty=True,
+):
+    """
+    Converts every curator JSON matched by inputs to an exchange JSON in output_dir
+    ("exchange_<file name>"), fanning the files out over a pool of worker processes.
+    Each file is added to a JSON-lines manifest as soon as it is converted, so an
+    interrupted run can be resumed without converting those files again.
+
+    Args:
+        inputs (list): directories, glob patterns or paths of curator JSON files.
+        output_dir (str): directory the exchange JSONs are written to (created if needed).
+        workers (int): number of worker processes, every core by default. With 1 the
+            files are converted in this process.
+        resume (bool): skip the files recorded as converted in the manifest. If False
+            the manifest is started over.
+        manifest_path (str): defaults to "bulk_convert_manifest.jsonl" in output_dir.
+        summary_path (str): where the summary is written, defaults to
+            "bulk_convert_summary.json" in output_dir.
+        validate (bool): validate the converted entries against the exchange schema.
+        pretty (bool): indent the exchange JSONs.
+
+    Returns:
+        dict: the summary (see summarize_records), also written to summary_path.
+
+    Raises:
+        ValueError: if two input files would be written to the same output file.
+
+    Example usage
+        summary = bulk_convert(["curator_backup/*.json"], "exchange_jsons", workers=8)
+        print(summary["invalid"])
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(output_dir, MANIFEST_FILE_NAME)
+    summary_path = summary_path or os.path.join(output_dir, SUMMARY_FILE_NAME)
+
+    input_files = find_input_files(inputs)
+    output_paths = {
+        input_path: os.path.abspath(get_output_path(input_path, output_dir))
+        for input_path in input_files
+    }
+    if len(set(output_paths.values())) != len(output_paths):
+        raise ValueError("Input files with the same file name would overwrite each other's output")
+
+    records = {}
+    if resume:
+        for input_path, record in load_manifest(manifest_path).items():
+            if output_paths.get(input_path) == record["output"]:
+                records[input_path] = dict(record, resumed=True)
+    tasks = [
+        (input_path, output_paths[input_path], validate, pretty)
+        for input_path in input_files
+        if input_path not in records
+    ]
+
+    with open(manifest_path, "ab" if resume else "wb") as manifest_file:
+        def add_record(record):
+            records[record["input"]] = record
+            if "error" not in record:
+                manifest_file.write(json_io.dumps_bytes(record) + b"\n")
+                manifest_file.flush()
+
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                add_record(_convert_task(task))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_convert_task, task) for task in tasks]
+                for future in as_completed(futures):
+                    add_record(future.result())
+
+    summary = summarize_records(
+        [records[input_path] for input_path in input_files], time.perf_counter() - start
+    )
+    json_io.dump_file(summary, summary_path, pretty=True)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m conversion.curator_conversion.bulk_convert",
+        description="Convert NP-MRD Curator JSONs to NP-MRD Exchange JSONs in parallel",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="Directories, glob patterns or paths of curator JSON files"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory to write the exchange JSONs to"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="Number of worker processes (default: one per core)",
+    )
+    parser.add_argument(
+        "--restart", dest="resume", action="store_false",
+        help="Convert every file again rather than resuming from the manifest",
+    )
+    parser.add_argument("--manifest", dest="manifest_path", help="Path of the resume manifest")
+    parser.add_argument("--summary", dest="summary_path", help="Path to write the summary JSON to")
+    parser.add_argument(
+        "--no-validate", dest="validate", action="store_false",
+        help="Skip schema validation of the converted entries",
+    )
+    parser.add_argument(
+        "--compact", dest="pretty", action="store_false",
+        help="Write the exchange JSONs without indentation",
+    )
+    args = parser.parse_args(argv)
+
+    summary = bulk_convert(**vars(args))
+    print(json_io.dumps({
+        key: value if isinstance(value, (int, float)) or value is None else len(value)
+        for key, value in summary.items()
+        if key != "per_file"
+    }))
+    return 1 if summary["failed_files"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,93 @@
-import json
 import os
-import pandas as pd
-import jsonschema
+import threading
 import traceback
 import uuid
 import copy
 
+try:
+    from ... import json_io
+    from ...validation.schema_validator import get_schema_validator, schema_fingerprint
+except ImportError:
+    # Imported with the repo root on sys.path (i.e. "python -m conversion...")
+    import json_io
+    from validation.schema_validator import get_schema_validator, schema_fingerprint
+
 # Get the directory of the current script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
 # Define the path to the schema file one directory level up from the script's directory
 schema_file_path = os.path.join(script_dir, '..', '..', 'json_schema', 'npmrd-exchange_schema.json')
 
+
+def clone_template(template):
+    """
+    Structural copy of a template made of dicts, lists and JSON scalars (strings,
+    numbers, booleans and None). Much faster than copy.deepcopy as there is no memo
+    or type dispatch, and scalars are immutable so they are shared rather than copied.
+    """
+    if type(template) is dict:
+        return {key: clone_template(value) for key, value in template.items()}
+    if type(template) is list:
+        return [clone_template(value) for value in template]
+    return template
+
+
+class ConverterSchemaRegistry:
+    """
+    Process-wide cache of what CuratorConverter derives from the exchange schema. The
+    schema file is read once and the same schema dict is handed to every converter
+    (which must treat it as read-only), so they also share one schema validator. The
+    empty-entry templates are generated once per schema fingerprint.
+
+    Example usage
+        registry = ConverterSchemaRegistry(file_path="path/to/schema.json")
+        curator_converter = CuratorConverter(curator_json_dict, schema_registry=registry)
+    """
+
+    def __init__(self, file_path=schema_file_path):
+        self.file_path = file_path
+        self._schema = None
+        # schema fingerprint -> templates (see CuratorConverter.get_templates)
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get_schema(self):
+        """Returns the shared schema, loading it from file_path on first use."""
+        if self._schema is None:
+            with self._lock:
+                if self._schema is None:
+                    self._schema = CuratorConverter.load_schema_json(self.file_path)
+        return self._schema
+
+    def get_validator(self, schema=None):
+        """Returns the shared schema validator for schema (defaults to get_schema())."""
+        return get_schema_validator(self.get_schema() if schema is None else schema)
+
+    def get_templates(self, schema, generate_templates):
+        """
+        Returns the templates cached for the fingerprint of schema, calling
+        generate_templates() to build them the first time that fingerprint is seen.
+        """
+        fingerprint = schema_fingerprint(schema)
+        templates = self._templates.get(fingerprint)
+        if templates is None:
+            with self._lock:
+                templates = self._templates.get(fingerprint)
+                if templates is None:
+                    templates = generate_templates()
+                    self._templates[fingerprint] = templates
+        return templates
+
+    def clear(self):
+        """Drop the cached schema and templates so the schema is re-read on next use."""
+        with self._lock:
+            self._schema = None
+            self._templates.clear()
+
+
+default_schema_registry = ConverterSchemaRegistry()
+
+
 class CuratorConverter:
     """
     Converts json output by the NP-MRD Curator to the standardized json format within the
@@ -27,24 +103,37 @@ class CuratorConverter:
     Example usage to convert a "curator_json_dict" (converted to a Dict)
         curator_converter = CuratorConverter(curator_json_dict)
         npmrd_exchange_dict = curator_converter.convert_json()
+
+    Example usage to write each entry out as soon as it is converted
+        for exchange_entry, entry_status in curator_converter.iter_convert_json():
+            if exchange_entry is not None:
+                writer.write(exchange_entry)
+        final_status_dict = curator_converter.final_status_dict
     
+    The schema, its validator and the empty-entry templates come from schema_registry
+    (default_schema_registry if None), so creating a converter per curator session
+    does not re-read or re-process the schema.
+
     Returns:
         npmrd_exchange_dict: Dict of generated npmrd-exchange_schema
     """
-    def __init__(self, curator_json_dict):
+    def __init__(self, curator_json_dict, schema_registry=None):
         self.curator_json_dict = curator_json_dict
-        self.schema = self.load_schema_json(schema_file_path)
+        self.schema_registry = default_schema_registry if schema_registry is None else schema_registry
+        self.schema = self.schema_registry.get_schema()
+        # Empty-entry templates generated from self.schema (see get_templates)
+        self._templates = None
+        # Status of the last conversion (see iter_convert_json)
+        self.final_status_dict = None
 
     @staticmethod
     def load_schema_json(file_path):
         """Load JSON data from a file."""
         try:
-            with open(file_path, 'r') as file:
-                schema = json.load(file)
-            return schema
+            return json_io.load_file(file_path)
         except FileNotFoundError:
             print(f"The schema file was not found at `{file_path}`")
-        except json.JSONDecodeError as e:
+        except json_io.JSONDecodeError as e:
             print(f"Error decoding the JSON file: {str(e)}")
         except Exception as e:
             print(f"An error occurred: {str(e)}")
@@ -115,41 +204,66 @@ class CuratorConverter:
 
         return schema
 
+    def generate_from_schema(self, empty_defaults_to_remove=None):
+        """
+        Generates an empty exchange json from a copy of the schema, after removing the
+        empty list 'default' at empty_defaults_to_remove so those lists get one empty item.
+        """
+        non_empty_schema = copy.deepcopy(self.schema)
+        if empty_defaults_to_remove:
+            non_empty_schema = self.remove_default_empty_list(non_empty_schema, empty_defaults_to_remove)
+        return self.generate_empty_value(schema=non_empty_schema)
+
+    def get_templates(self):
+        """
+        Returns the empty-entry templates, generated from the schema the first time they
+        are needed rather than for every entry and spectrum peak. The templates must not
+        be modified, copy them with clone_template before filling them in.
+
+        Returns:
+            dict: the templates with the fields...
+                entry: an empty exchange json
+                assignment_data: an empty nmr_data/assignment_data item
+                c_spectrum: an empty row of assignment_data c_nmr/spectrum
+                h_spectrum: an empty row of assignment_data h_nmr/spectrum
+        """
+        if self._templates is None:
+            self._templates = self.schema_registry.get_templates(self.schema, self._generate_templates)
+        return self._templates
+
+    def _generate_templates(self):
+        assignment_data = self.generate_from_schema([
+            "nmr_data.assignment_data"
+        ])['nmr_data']['assignment_data'][0]
+        c_spectrum = self.generate_from_schema([
+            "nmr_data.assignment_data",
+            "nmr_data.assignment_data[0].c_nmr.spectrum"
+        ])['nmr_data']['assignment_data'][0]['c_nmr']['spectrum'][0]
+        h_spectrum = self.generate_from_schema([
+            "nmr_data.assignment_data",
+            "nmr_data.assignment_data[0].h_nmr.spectrum"
+        ])['nmr_data']['assignment_data'][0]['h_nmr']['spectrum'][0]
+        return {
+            "entry": self.generate_from_schema(),
+            "assignment_data": assignment_data,
+            "c_spectrum": c_spectrum,
+            "h_spectrum": h_spectrum,
+        }
+
     def generate_json_from_schema(self):
-        schema_copy = copy.deepcopy(self.schema)
-        return self.generate_empty_value(schema_copy)
+        return clone_template(self.get_templates()["entry"])
     
     def generate_empty_json_from_schema(self):
-        schema_copy = copy.deepcopy(self.schema)
-        return self.generate_empty_value(schema_copy)
+        return clone_template(self.get_templates()["entry"])
 
     def get_empty_assignment_data_from_schema(self):
-        empty_defaults_to_remove = [
-            "nmr_data.assignment_data"
-        ]
-        non_empty_schema = copy.deepcopy(self.schema)
-        non_empty_schema = self.remove_default_empty_list(non_empty_schema, empty_defaults_to_remove) 
-        empty_entry = self.generate_empty_value(schema=non_empty_schema)['nmr_data']['assignment_data'][0]
-        return empty_entry
+        return clone_template(self.get_templates()["assignment_data"])
     
     def get_empty_c_spectrum_from_schema(self):
-        empty_defaults_to_remove = [
-            "nmr_data.assignment_data",
-            "nmr_data.assignment_data[0].c_nmr.spectrum"
-        ]
-        non_empty_schema = copy.deepcopy(self.schema)        
-        non_empty_schema = self.remove_default_empty_list(non_empty_schema, empty_defaults_to_remove)
-        empty_entry = self.generate_empty_value(schema=non_empty_schema)['nmr_data']['assignment_data'][0]['c_nmr']['spectrum'][0]
-        return empty_entry
+        return clone_template(self.get_templates()["c_spectrum"])
     
     def get_empty_h_spectrum_from_schema(self):
-        empty_defaults_to_remove = [
-            "nmr_data.assignment_data",
-            "nmr_data.assignment_data[0].h_nmr.spectrum"
-        ]
-        non_empty_schema = copy.deepcopy(self.schema)
-        non_empty_schema = self.remove_default_empty_list(non_empty_schema, empty_defaults_to_remove)
-        return self.generate_empty_value(schema=non_empty_schema)['nmr_data']['assignment_data'][0]['h_nmr']['spectrum'][0]
+        return clone_template(self.get_templates()["h_spectrum"])
 
     def strip_white_space(self, string):
         return string.strip() if string else ''
@@ -157,10 +271,43 @@ class CuratorConverter:
 
     def convert_json(self):
         """Update the schema with data from the input JSON."""
-        final_json_list = []
-        final_status_dict = {
+        final_json_list = [
+            new_json for new_json, entry_status in self.iter_convert_json() if new_json is not None
+        ]
+        return final_json_list, self.final_status_dict
+
+    def iter_convert_json(self, validate=True):
+        """
+        Converts the curator entries one at a time, yielding each exchange json as soon as
+        it is converted so it can be written out (or saved) while the rest are converted.
+        Only the entry being converted is held in memory.
+
+        Args:
+            validate (bool): validate each entry against the schema as it is converted.
+                If False "valid" is None in the entry statuses and the entries can be
+                validated later with validate_entry.
+
+        Yields:
+            tuple: (new_json, entry_status) for every curator entry, where new_json is None
+            for entries that were skipped (peak lists only) and entry_status has the
+            fields...
+                index (int): index of the entry in the curator json
+                converted (bool): whether new_json was generated
+                valid (bool): whether new_json passed schema validation (None if not run)
+                validation_error (str): the schema validation errors, one per line
+                no_c_nmr, no_h_nmr, peak_list_only (bool): the per entry versions of the
+                    "entries_with_..." fields of the final status
+
+        Returns:
+            dict: the final status for the whole curator json (the same one convert_json
+            returns), also kept in self.final_status_dict. Fields are updated as the
+            entries are yielded and are final once the generator is exhausted. "valid" is
+            False if any converted entry failed schema validation (None if validate is
+            False).
+        """
+        self.final_status_dict = final_status_dict = {
             "converted": True,
-            "valid": True,
+            "valid": True if validate else None,
             "validation_error": "",
             "session_uuid": "",
             "doi": "",
@@ -175,109 +322,154 @@ class CuratorConverter:
         except:
             pass
 
+        templates = self.get_templates()
+
         # Iterate through full input json
-        for curator_entry in self.curator_json_dict:
-            new_json = self.generate_empty_json_from_schema()
-            new_json['compound_name'] = self.strip_white_space(curator_entry['name'])
-            new_json['np_mrd_id'] = None
-            new_json['smiles'] = self.strip_white_space(curator_entry['smiles'])
-            new_json['citation']['doi'] = self.strip_white_space(curator_entry['origin_doi'])
-            new_json['origin']['genus'] = self.strip_white_space(curator_entry['origin_genus'])
-            new_json['origin']['species'] = self.strip_white_space(curator_entry['origin_species'])
-            new_json['submission']['source'] = "npmrd_curator"
-            new_json['nmr_data']['experimental_data']['nmr_metadata'] = []
-            new_json['nmr_data']['peak_lists'] = []
-            new_json['submission']['source'] = "npmrd_curator"
-            
-            # Entries to fill out the "assignment_data" list of the exchange json with.
-            # Typically one for C and one for H
-            new_assignment_curation = self.get_empty_assignment_data_from_schema()
-            
-            new_assignment_curation['curator_email_address'] = self.strip_white_space(curator_entry['curator_email_address'])
-            new_assignment_curation['rdkit_version'] = curator_entry['rdkit_version']
-            
-            new_assignment_curation['canonicalized_mol_block'] = curator_entry['canonicalized_mol_block']
-            
-            new_assignment_uuid_c = str(uuid.uuid4())
-            new_assignment_uuid_h = str(uuid.uuid4())
+        for index, curator_entry in enumerate(self.curator_json_dict):
+            entry_status = {
+                "index": index,
+                "converted": False,
+                "valid": None,
+                "validation_error": "",
+                "no_c_nmr": False,
+                "no_h_nmr": False,
+                "peak_list_only": False
+            }
+            new_json = self.convert_entry(curator_entry, templates, entry_status)
+
+            final_status_dict['entries_with_no_c_nmr'] |= entry_status['no_c_nmr']
+            final_status_dict['entries_with_no_h_nmr'] |= entry_status['no_h_nmr']
+            final_status_dict['entries_with_peak_list_only'] |= entry_status['peak_list_only']
+
+            if new_json is not None:
+                entry_status['converted'] = True
+                if validate:
+                    entry_status['validation_error'] = self.validate_entry(new_json)
+                    entry_status['valid'] = not entry_status['validation_error']
+                    final_status_dict['validation_error'] += entry_status['validation_error']
+                    if not entry_status['valid']:
+                        final_status_dict['valid'] = False
+
+            yield new_json, entry_status
+
+        return final_status_dict
+
+    def validate_entry(self, new_json):
+        """
+        Validates a converted exchange json against the schema.
+
+        Returns:
+            str: the validation errors, one per line ("" if new_json is valid).
+        """
+        # Built once per schema and shared with every other converter / consolidator
+        schema_validator = self.schema_registry.get_validator(self.schema)
+        return "".join(str(e) + "\n" for e in schema_validator.iter_errors(new_json))
+
+    def convert_entry(self, curator_entry, templates=None, entry_status=None):
+        """
+        Converts a single curator entry to an exchange json.
+
+        Args:
+            curator_entry (dict): one entry of the curator json.
+            templates (dict): the empty-entry templates (see get_templates).
+            entry_status (dict): if given its "no_c_nmr", "no_h_nmr" and "peak_list_only"
+                fields are set (see iter_convert_json).
+
+        Returns:
+            dict: the exchange json, or None if the entry only holds peak lists.
+        """
+        templates = self.get_templates() if templates is None else templates
+        entry_status = {} if entry_status is None else entry_status
+
+        new_json = clone_template(templates["entry"])
+        new_json['compound_name'] = self.strip_white_space(curator_entry['name'])
+        new_json['np_mrd_id'] = None
+        new_json['smiles'] = self.strip_white_space(curator_entry['smiles'])
+        new_json['citation']['doi'] = self.strip_white_space(curator_entry['origin_doi'])
+        new_json['origin']['genus'] = self.strip_white_space(curator_entry['origin_genus'])
+        new_json['origin']['species'] = self.strip_white_space(curator_entry['origin_species'])
+        new_json['submission']['source'] = "npmrd_curator"
+        new_json['nmr_data']['experimental_data']['nmr_metadata'] = []
+        new_json['nmr_data']['peak_lists'] = []
+        new_json['submission']['source'] = "npmrd_curator"
+        
+        # Entries to fill out the "assignment_data" list of the exchange json with.
+        # Typically one for C and one for H
+        new_assignment_curation = clone_template(templates["assignment_data"])
+        
+        new_assignment_curation['curator_email_address'] = self.strip_white_space(curator_entry['curator_email_address'])
+        new_assignment_curation['rdkit_version'] = curator_entry['rdkit_version']
+        
+        new_assignment_curation['canonicalized_mol_block'] = curator_entry['canonicalized_mol_block']
+        
+        new_assignment_uuid_c = str(uuid.uuid4())
+        new_assignment_uuid_h = str(uuid.uuid4())
+        
+        if len(curator_entry['c_nmr']['spectrum']) > 0:
+            # Check if rdkit_index is present in nmr. If it isn't then assume this is a peak list.
+            if (
+                not "rdkit_index" in curator_entry['c_nmr']['spectrum'][0]
+                or not curator_entry['c_nmr']['spectrum'][0]["rdkit_index"]
+            ):
+                entry_status['peak_list_only'] = True
+                return None
             
-            if len(curator_entry['c_nmr']['spectrum']) > 0:
-                # Check if rdkit_index is present in nmr. If it isn't then assume this is a peak list.
-                if (
-                    not "rdkit_index" in curator_entry['c_nmr']['spectrum'][0]
-                    or not curator_entry['c_nmr']['spectrum'][0]["rdkit_index"]
-                ):
-                    final_status_dict['entries_with_peak_list_only'] = True
-                    continue
-                
-                new_assignment_curation['c_nmr']['assignment_uuid'] = new_assignment_uuid_c
-                new_assignment_curation['c_nmr']['solvent'] = curator_entry['c_nmr']['solvent']
-                if curator_entry['c_nmr']['temperature']: # Temperature can be empty string (not accepted) so make sure there's a value
-                    new_assignment_curation['c_nmr']['temperature'] = int(curator_entry['c_nmr']['temperature'])
-                new_assignment_curation['c_nmr']['temperature_units'] = "K"
-                new_assignment_curation['c_nmr']['reference'] = curator_entry['c_nmr']['reference']
-                new_assignment_curation['c_nmr']['frequency'] = curator_entry['c_nmr']['frequency']
-                new_assignment_curation['c_nmr']['frequency_units'] = "MHz"
-                new_assignment_curation['c_nmr']['assignment_data_embargo_release_ready'] = None
-                
-                new_spectrum_list = []
-                
-                for curator_c_spectrum in curator_entry['c_nmr']['spectrum']:
-                    new_c_spectrum_entry = self.get_empty_c_spectrum_from_schema()
-                    new_c_spectrum_entry['shift'] = curator_c_spectrum['shift']
-                    new_c_spectrum_entry['mol_block_index'] = [curator_c_spectrum['rdkit_index']]
-                    new_spectrum_list.append(new_c_spectrum_entry)
-
-                new_assignment_curation['c_nmr']['spectrum'] = new_spectrum_list
-            else:
-                final_status_dict['entries_with_no_c_nmr'] = True
-
-
-            if len(curator_entry['h_nmr']['spectrum']) > 0:
-                # Check if rdkit_index is present in nmr. If it isn't then assume this is a peak list.
-                if (
-                    not "rdkit_index" in curator_entry['h_nmr']['spectrum'][0]
-                    or not curator_entry['h_nmr']['spectrum'][0]["rdkit_index"]
-                ):
-                    final_status_dict['entries_with_peak_list_only'] = True
-                    continue
-                
-                new_assignment_curation['h_nmr']['assignment_uuid'] = new_assignment_uuid_h
-                new_assignment_curation['h_nmr']['solvent'] = curator_entry['h_nmr']['solvent']
-                if curator_entry['h_nmr']['temperature']: # Temperature can be empty string (not accepted) so make sure there's a value
-                    new_assignment_curation['h_nmr']['temperature'] = int(curator_entry['h_nmr']['temperature'])
-                new_assignment_curation['h_nmr']['temperature_units'] = "K"
-                new_assignment_curation['h_nmr']['reference'] = curator_entry['h_nmr']['reference']
-                new_assignment_curation['h_nmr']['frequency'] = curator_entry['h_nmr']['frequency']
-                new_assignment_curation['h_nmr']['frequency_units'] = "MHz"
-                new_assignment_curation['h_nmr']['assignment_data_embargo_release_ready'] = None
-                
-                new_spectrum_list = []
-                for curator_h_spectrum in curator_entry['h_nmr']['spectrum']:
-                    new_h_spectrum_entry = self.get_empty_h_spectrum_from_schema()
-                    new_h_spectrum_entry['shift'] = curator_h_spectrum['shift']
-                    new_h_spectrum_entry['multiplicity'] = curator_h_spectrum['multiplicity']
-                    new_h_spectrum_entry['coupling'] = curator_h_spectrum['coupling']
-                    new_h_spectrum_entry['atom_index'] = curator_h_spectrum['atom_index']
-                    new_h_spectrum_entry['mol_block_index'] = curator_h_spectrum['rdkit_index']
-                    new_h_spectrum_entry['interchangeable_index'] = curator_h_spectrum['interchangable_index']
-                    new_spectrum_list.append(new_h_spectrum_entry)
-
-                new_assignment_curation['h_nmr']['spectrum'] = new_spectrum_list
-            else:
-                final_status_dict['entries_with_no_h_nmr'] = True
+            new_assignment_curation['c_nmr']['assignment_uuid'] = new_assignment_uuid_c
+            new_assignment_curation['c_nmr']['solvent'] = curator_entry['c_nmr']['solvent']
+            if curator_entry['c_nmr']['temperature']: # Temperature can be empty string (not accepted) so make sure there's a value
+                new_assignment_curation['c_nmr']['temperature'] = int(curator_entry['c_nmr']['temperature'])
+            new_assignment_curation['c_nmr']['temperature_units'] = "K"
+            new_assignment_curation['c_nmr']['reference'] = curator_entry['c_nmr']['reference']
+            new_assignment_curation['c_nmr']['frequency'] = curator_entry['c_nmr']['frequency']
+            new_assignment_curation['c_nmr']['frequency_units'] = "MHz"
+            new_assignment_curation['c_nmr']['assignment_data_embargo_release_ready'] = None
             
-            new_json['nmr_data']['assignment_data'].append(new_assignment_curation)
-        
-            # Validate json against schema
-            try:
-                jsonschema.validate(instance=new_json, schema=self.schema)
-            except jsonschema.exceptions.ValidationError as e:
-                final_status_dict['validation_error'] += (str(e) + "\n")
+            new_spectrum_list = []
             
-            final_json_list.append(new_json)
-        
-        return final_json_list, final_status_dict
+            for curator_c_spectrum in curator_entry['c_nmr']['spectrum']:
+                new_c_spectrum_entry = clone_template(templates["c_spectrum"])
+                new_c_spectrum_entry['shift'] = curator_c_spectrum['shift']
+                new_c_spectrum_entry['mol_block_index'] = [curator_c_spectrum['rdkit_index']]
+                new_spectrum_list.append(new_c_spectrum_entry)
 
+            new_assignment_curation['c_nmr']['spectrum'] = new_spectrum_list
+        else:
+            entry_status['no_c_nmr'] = True
 
 
+        if len(curator_entry['h_nmr']['spectrum']) > 0:
+            # Check if rdkit_index is present in nmr. If it isn't then assume this is a peak list.
+            if (
+                not "rdkit_index" in curator_entry['h_nmr']['spectrum'][0]
+                or not curator_entry['h_nmr']['spectrum'][0]["rdkit_index"]
+            ):
+                entry_status['peak_list_only'] = True
+                return None
+            
+            new_assignment_curation['h_nmr']['assignment_uuid'] = new_assignment_uuid_h
+            new_assignment_curation['h_nmr']['solvent'] = curator_entry['h_nmr']['solvent']
+            if curator_entry['h_nmr']['temperature']: # Temperature can be empty string (not accepted) so make sure there's a value
+                new_assignment_curation['h_nmr']['temperature'] = int(curator_entry['h_nmr']['temperature'])
+            new_assignment_curation['h_nmr']['temperature_units'] = "K"
+            new_assignment_curation['h_nmr']['reference'] = curator_entry['h_nmr']['reference']
+            new_assignment_curation['h_nmr']['frequency'] = curator_entry['h_nmr']['frequency']
+            new_assignment_curation['h_nmr']['frequency_units'] = "MHz"
+            new_assignment_curation['h_nmr']['assignment_data_embargo_release_ready'] = None
+            
+            new_spectrum_list = []
+            for curator_h_spectrum in curator_entry['h_nmr']['spectrum']:
+                new_h_spectrum_entry = clone_template(templates["h_spectrum"])
+                new_h_spectrum_entry['shift'] = curator_h_spectrum['shift']
+                new_h_spectrum_entry['multiplicity'] = curator_h_spectrum['multiplicity']
+                new_h_spectrum_entry['coupling'] = curator_h_spectrum['coupling']
+                new_h_spectrum_entry['atom_index'] = curator_h_spectrum['atom_index']
+                new_h_spectrum_entry['mol_block_index'] = curator_h_spectrum['rdkit_index']
+                new_h_spectrum_entry['interchangeable_index'] = curator_h_spectrum['interchangable_index']
+                new_spectrum_list.append(new_h_spectrum_entry)
+
+            new_assignment_curation['h_nmr']['spectrum'] = new_spectrum_list
+        else:
+            entry_status['no_h_nmr'] = True
+        
+        new_json['nmr_data']['assignment_data'].append(new_assignment_curation)
+        return new_json
@@ -0,0 +1,195 @@
+import unittest
+import os
+import sys
+import json
+import copy
+import shutil
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from conversion.curator_conversion.npmrd_curator_converter import (
+    CuratorConverter,
+    ConverterSchemaRegistry,
+    clone_template,
+    schema_file_path,
+)
+from conversion.curator_conversion.bulk_convert import bulk_convert
+
+class TestCuratorConverter(unittest.TestCase):
+
+    def setUp(self):
+        self.test_input_folder = os.path.join(os.path.dirname(__file__), 'test_input_jsons')
+        self.curator_json_file = "npmrd_curator_32edf7a5-ae15-429a-8d84-f5c839952c91.json"
+
+    def load_curator_json(self, file_name):
+        with open(os.path.join(self.test_input_folder, file_name), 'r') as file:
+            return json.load(file)
+
+    def test_templates_match_schema_generation(self):
+        converter = CuratorConverter([])
+        templates = converter.get_templates()
+        self.assertEqual(templates["entry"], converter.generate_from_schema())
+        self.assertEqual(
+            templates["c_spectrum"],
+            converter.generate_from_schema([
+                "nmr_data.assignment_data",
+                "nmr_data.assignment_data[0].c_nmr.spectrum"
+            ])['nmr_data']['assignment_data'][0]['c_nmr']['spectrum'][0]
+        )
+        self.assertEqual(templates["h_spectrum"]["coupling"], [])
+        self.assertIn("c_nmr", templates["assignment_data"])
+
+    def test_clones_do_not_share_mutable_values(self):
+        converter = CuratorConverter([])
+        template = converter.get_templates()["h_spectrum"]
+        template_before = json.dumps(template)
+
+        first_row = converter.get_empty_h_spectrum_from_schema()
+        first_row["coupling"].append(7.5)
+        second_row = clone_template(template)
+
+        self.assertEqual(second_row["coupling"], [])
+        self.assertEqual(json.dumps(template), template_before)
+        self.assertIsNot(first_row["mol_block_index"], second_row["mol_block_index"])
+
+    def test_convert_json_leaves_templates_untouched(self):
+        converter = CuratorConverter(self.load_curator_json(self.curator_json_file))
+        templates_before = json.dumps(converter.get_templates())
+
+        converted_json_list, status = converter.convert_json()
+
+        self.assertTrue(status["converted"])
+        self.assertGreater(len(converted_json_list), 0)
+        self.assertEqual(json.dumps(converter.get_templates()), templates_before)
+        for entry in converted_json_list:
+            for assignment_data in entry['nmr_data']['assignment_data']:
+                self.assertGreater(len(assignment_data['c_nmr']['spectrum']), 0)
+
+    def test_converters_share_schema_and_templates(self):
+        first_converter = CuratorConverter([])
+        second_converter = CuratorConverter(self.load_curator_json(self.curator_json_file))
+        self.assertIs(first_converter.schema, second_converter.schema)
+        self.assertIs(first_converter.get_templates(), second_converter.get_templates())
+        self.assertIs(
+            first_converter.schema_registry.get_validator(),
+            second_converter.schema_registry.get_validator(second_converter.schema),
+        )
+
+    def test_separate_registry_loads_its_own_schema(self):
+        registry = ConverterSchemaRegistry(file_path=schema_file_path)
+        converter = CuratorConverter([], schema_registry=registry)
+        self.assertIsNot(converter.schema, CuratorConverter([]).schema)
+        # Equal schemas share templates only within a registry
+        self.assertEqual(converter.get_templates(), CuratorConverter([]).get_templates())
+        self.assertIs(converter.get_templates(), CuratorConverter([], schema_registry=registry).get_templates())
+
+        registry.clear()
+        self.assertIsNot(CuratorConverter([], schema_registry=registry).schema, converter.schema)
+
+    def test_iter_convert_json_yields_entry_statuses(self):
+        curator_json = self.load_curator_json(self.curator_json_file)
+        # Turn the second entry into a peak list (no rdkit_index)
+        curator_json[1] = copy.deepcopy(curator_json[1])
+        curator_json[1]['c_nmr']['spectrum'][0]['rdkit_index'] = None
+        converter = CuratorConverter(curator_json)
+
+        converted = list(converter.iter_convert_json())
+
+        self.assertEqual([entry_status["index"] for _, entry_status in converted], list(range(len(curator_json))))
+        skipped_json, skipped_status = converted[1]
+        self.assertIsNone(skipped_json)
+        self.assertTrue(skipped_status["peak_list_only"])
+        self.assertFalse(skipped_status["converted"])
+        self.assertTrue(converter.final_status_dict["entries_with_peak_list_only"])
+        self.assertEqual(
+            converter.final_status_dict["validation_error"],
+            "".join(entry_status["validation_error"] for _, entry_status in converted),
+        )
+        # False as soon as any converted entry is invalid
+        self.assertIs(
+            converter.final_status_dict["valid"],
+            all(entry_status["valid"] for _, entry_status in converted if entry_status["converted"]),
+        )
+
+        converted_json_list, status = CuratorConverter(curator_json).convert_json()
+        self.assertEqual(len(converted_json_list), len(curator_json) - 1)
+        self.assertEqual(status["entries_with_peak_list_only"], True)
+
+    def test_deferred_validation(self):
+        converter = CuratorConverter(self.load_curator_json(self.curator_json_file))
+        for new_json, entry_status in converter.iter_convert_json(validate=False):
+            self.assertIsNone(entry_status["valid"])
+            self.assertEqual(entry_status["validation_error"], "")
+            schema_errors = converter.validate_entry(new_json)
+            self.assertIsInstance(schema_errors, str)
+        self.assertEqual(converter.final_status_dict["validation_error"], "")
+        self.assertIsNone(converter.final_status_dict["valid"])
+        self.assertTrue(converter.final_status_dict["converted"])
+
+    def test_final_status_valid(self):
+        curator_json = self.load_curator_json(self.curator_json_file)
+        for invalid_indexes, expected_valid in [([], True), ([len(curator_json) - 1], False)]:
+            with self.subTest(invalid_indexes=invalid_indexes):
+                converter = CuratorConverter(curator_json)
+                # Every entry passes validation except the ones at invalid_indexes
+                converted_jsons = []
+                def validate_entry(new_json):
+                    converted_jsons.append(new_json)
+                    return "error\n" if len(converted_jsons) - 1 in invalid_indexes else ""
+                converter.validate_entry = validate_entry
+
+                statuses = [entry_status for _, entry_status in converter.iter_convert_json()]
+                self.assertIs(converter.final_status_dict["valid"], expected_valid)
+                self.assertEqual(
+                    [entry_status["valid"] for entry_status in statuses],
+                    [index not in invalid_indexes for index in range(len(curator_json))],
+                )
+
+class TestBulkConvert(unittest.TestCase):
+
+    def setUp(self):
+        self.test_input_folder = os.path.join(os.path.dirname(__file__), 'test_input_jsons')
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, 'output')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_bulk_convert_and_resume(self):
+        summary = bulk_convert([self.test_input_folder], self.output_dir, workers=1)
+
+        input_count = len(os.listdir(self.test_input_folder))
+        self.assertEqual(summary["files"], input_count)
+        self.assertEqual(summary["converted_files"], input_count)
+        self.assertEqual(summary["failed_files"], 0)
+        self.assertEqual(len(summary["per_file"]), input_count)
+        for record in summary["per_file"]:
+            self.assertTrue(os.path.exists(record["output"]))
+            self.assertGreaterEqual(record["seconds"], 0)
+            self.assertIs(record["valid"], record["invalid_entries"] == 0)
+        with open(os.path.join(self.output_dir, "bulk_convert_summary.json"), 'r') as summary_file:
+            self.assertEqual(json.load(summary_file)["entries"], summary["entries"])
+
+        # A second run only converts files missing from the manifest
+        os.remove(summary["per_file"][0]["output"])
+        resumed_summary = bulk_convert([os.path.join(self.test_input_folder, "*.json")], self.output_dir, workers=1)
+        self.assertEqual(resumed_summary["converted_files"], 1)
+        self.assertEqual(resumed_summary["resumed_files"], input_count - 1)
+        self.assertEqual(resumed_summary["entries"], summary["entries"])
+
+    def test_failed_files_are_reported_and_retried(self):
+        bad_file = os.path.join(self.temp_dir, "bad_curator.json")
+        with open(bad_file, 'w') as file:
+            file.write('[{"name": "missing fields"}]')
+
+        summary = bulk_convert([bad_file], self.output_dir, workers=1)
+        self.assertEqual(summary["failed_files"], 1)
+        self.assertIn("KeyError", summary["failed"][0]["error"])
+
+        summary = bulk_convert([bad_file], self.output_dir, workers=1)
+        self.assertEqual(summary["resumed_files"], 0)
+        self.assertEqual(summary["failed_files"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
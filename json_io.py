@@ -0,0 +1,99 @@
+import json
+
+# orjson is used when installed (several times faster at both encoding and decoding),
+# otherwise everything falls back to the standard library json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Number of spaces per level of pretty output (the only indent orjson supports)
+PRETTY_INDENT = 2
+
+# Output differences between the backends, both decoding to the same values...
+#   - floats in exponent form: orjson writes 1e16 and 1e-7, json writes 1e+16 and 1e-07
+#   - NaN, Infinity and -Infinity: orjson writes null, json writes the NaN/Infinity tokens
+#     (not valid JSON, but accepted by loads with either backend)
+
+# Raised by loads for invalid JSON whichever backend is in use (orjson.JSONDecodeError
+# is a subclass of it)
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """
+    Decode JSON from a str, bytes or bytearray. The NaN, Infinity and -Infinity tokens
+    are accepted (as json accepts them) whichever backend is in use.
+
+    Raises:
+        JSONDecodeError: if data is not valid JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN/Infinity, so data it can not decode is given to json,
+            # which raises again if it really is invalid
+            pass
+    return json.loads(data)
+
+
+def dumps_bytes(obj, pretty=False, sort_keys=False, default=None):
+    """
+    Encode obj as UTF-8 JSON bytes, ready to write to a binary file or socket without a
+    round trip through str.
+
+    Args:
+        obj: data to encode.
+        pretty (bool): indent the output by PRETTY_INDENT spaces per level instead of
+            the compact form with no whitespace.
+        sort_keys (bool): sort the keys of every dictionary.
+        default (callable): called for objects that can not be encoded otherwise.
+
+    Returns:
+        bytes: the encoded JSON.
+    """
+    if orjson is not None:
+        option = 0
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # Data orjson rejects but json accepts (i.e. non-string keys or integers
+            # over 64 bits) is encoded by the standard library instead
+            pass
+    return _stdlib_dumps(obj, pretty, sort_keys, default).encode("utf-8")
+
+
+def dumps(obj, pretty=False, sort_keys=False, default=None):
+    """Encode obj as a JSON str. See dumps_bytes for the arguments."""
+    if orjson is not None:
+        return dumps_bytes(obj, pretty, sort_keys, default).decode("utf-8")
+    return _stdlib_dumps(obj, pretty, sort_keys, default)
+
+
+def _stdlib_dumps(obj, pretty, sort_keys, default):
+    if pretty:
+        return json.dumps(
+            obj, indent=PRETTY_INDENT, sort_keys=sort_keys, default=default, ensure_ascii=False
+        )
+    return json.dumps(
+        obj, separators=(",", ":"), sort_keys=sort_keys, default=default, ensure_ascii=False
+    )
+
+
+def load_file(file_path):
+    """Read and decode the JSON file at file_path (read as bytes, decoded in one go)."""
+    with open(file_path, "rb") as file:
+        return loads(file.read())
+
+
+def dump_file(obj, file_path, pretty=False, sort_keys=False, default=None):
+    """Encode obj and write it to file_path. See dumps_bytes for the arguments."""
+    with open(file_path, "wb") as file:
+        file.write(dumps_bytes(obj, pretty, sort_keys, default))
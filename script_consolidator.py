@@ -1,76 +1,260 @@
-import jsonschema
-from jsonschema import exceptions
 import sys
-import json
-from dateutil import parser
 import os
+import copy
+import signal
+import threading
+import warnings
+from contextlib import contextmanager
 
+from . import json_io
+from .standardization import standardizer
 from .standardization.standardizer import JSONStandardizer
-from .validation.validator import JSONValidator
+from .validation import validator
+from .validation.schema_validator import (
+    get_schema_validator,
+    format_schema_error,
+    is_schema_error,
+    load_schema,
+)
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 schema_file_path = os.path.join(
     current_dir, "json_schema", "npmrd-exchange_schema.json"
 )
-with open(schema_file_path) as f:
-    json_schema = json.load(f)
+
+
+def __getattr__(name):
+    # json_schema is only read from schema_file_path the first time it is accessed
+    if name == "json_schema":
+        globals()["json_schema"] = load_schema(schema_file_path)
+        return globals()["json_schema"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Entries sent to a worker process at a time by run_scripts
+DEFAULT_CHUNKSIZE = 64
+
+
+class EntryTimeoutError(BaseException):
+    """
+    Raised by entry_timeout. Derives from BaseException (like KeyboardInterrupt) so the
+    broad "except Exception" handlers of the steps (i.e. schema validation or the date
+    rules) can not swallow it and carry on with the entry.
+    """
+
+
+@contextmanager
+def entry_timeout(seconds):
+    """
+    Raises EntryTimeoutError in the block once "seconds" have passed. Needs SIGALRM and
+    the main thread (as in the worker processes), otherwise a RuntimeWarning is issued
+    and the block runs unbounded.
+    """
+    if seconds is None:
+        yield
+        return
+    if not hasattr(signal, "SIGALRM"):
+        warnings.warn(
+            "Entry timeouts need SIGALRM, running without a timeout",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        yield
+        return
+    if threading.current_thread() is not threading.main_thread():
+        warnings.warn(
+            "Entry timeouts only work in the main thread, running without a timeout",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        yield
+        return
+
+    def handle_alarm(signum, frame):
+        raise EntryTimeoutError(f"Entry timed out after {seconds} seconds")
+
+    previous_handler = signal.signal(signal.SIGALRM, handle_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+# ScriptConsolidator used by run_scripts worker processes, built once per worker
+_worker_consolidator = None
+
+
+def _init_worker(engines):
+    global _worker_consolidator
+    standardizer_engine, validator_engine = engines
+    _worker_consolidator = ScriptConsolidator([], standardizer_engine, validator_engine)
+    # Build the schema validator up front rather than in the first entry
+    get_schema_validator(compiled=True)
+
+
+def _process_in_worker(task):
+    json_data, options = task
+    return _worker_consolidator._process_entry(json_data, *options)
 
 
 class ScriptConsolidator:
-    def __init__(self, json_list):
+    def __init__(self, json_list, standardizer_engine=None, validator_engine=None):
         self.json_list = json_list
         self.results = {}
+        # Engines are stateless and shared, so they are built once rather than per entry
+        self.standardizer_engine = (
+            standardizer.get_default_engine()
+            if standardizer_engine is None
+            else standardizer_engine
+        )
+        self.validator_engine = (
+            validator.get_default_engine()
+            if validator_engine is None
+            else validator_engine
+        )
+
+    def run_scripts(
+        self,
+        run_schema=True,
+        run_standardizer=True,
+        run_validator=True,
+        workers=1,
+        chunksize=DEFAULT_CHUNKSIZE,
+        timeout=None,
+    ):
+        """
+        Standardize, schema-validate and validate every entry of self.json_list.
+
+        Args:
+            run_schema (bool): validate each entry against the exchange json schema.
+            run_standardizer (bool): standardize each entry.
+            run_validator (bool): run the custom validator on each entry.
+            workers (int): number of worker processes (None for one per core). With 1
+                the entries are processed in this process and standardized in place.
+            chunksize (int): number of entries sent to a worker at a time.
+            timeout (float): seconds an entry may take before it is abandoned. The entry
+                is then returned unchanged with an "error" in its result. Only enforced
+                on platforms with SIGALRM, and when the entries are processed in this
+                process, only if called from the main thread (not i.e. from the
+                connection threads of server.serve_unix_socket). Otherwise a
+                RuntimeWarning is issued and the entries run without a timeout.
+
+        Returns:
+            tuple: (updated_json_list, result_dict) with entries and results in the
+            order of self.json_list.
+        """
+        options = (run_schema, run_standardizer, run_validator, timeout)
+        if workers == 1 or len(self.json_list) <= chunksize:
+            processed = list(self.iter_scripts(*options))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self._worker_engines(),),
+            ) as executor:
+                processed = list(
+                    executor.map(
+                        _process_in_worker,
+                        [(json_data, options) for json_data in self.json_list],
+                        chunksize=chunksize,
+                    )
+                )
 
-    def run_scripts(self, run_schema=True, run_standardizer=True, run_validator=True):
         updated_json_list = []
         result_dict = {}
-        for i, json_data in enumerate(self.json_list):
-            result_dict[i] = {}
-            result_dict[i]["inchikey"] = json_data.get("inchikey", "")
-            result_dict[i]["source"] = json_data.get("submission", {}).get("source", "")
-            result_dict[i]["type"] = json_data.get("submission", {}).get("type", "")
-
-            if run_standardizer:
-                standardizer = JSONStandardizer(json_data)
-                (
-                    standardized_json_data,
-                    standardizer_notes,
-                ) = standardizer.standardize()
-                updated_json_list.append(standardized_json_data)
-                result_dict[i]["standardizer_notes"] = standardizer_notes
-            else:
-                updated_json_list.append(json_data)
-
-            if run_schema:
-                result_dict[i]["schema"] = {}
-                result_dict[i]["schema"]["valid"] = False
-                result_dict[i]["schema"]["message"] = []
-
-                try:
-                    jsonschema.validate(json_data, json_schema)
-                    result_dict[i]["schema"]["valid"] = True
-                except jsonschema.exceptions.ValidationError as e:
-                    for error in sorted(e.path):
-                        result_dict[i]["schema"]["message"] = result_dict[i]["schema"][
-                            "message"
-                        ].append(f"Path: {'/'.join(str(p) for p in error)}")
-                except exceptions.SchemaError as e:
-                    result_dict[i]["schema"]["message"] = result_dict[i]["schema"][
-                        "message"
-                    ].append(f"Schema error: {e}")
-                except Exception as e:
-                    result_dict[i]["schema"]["message"] = result_dict[i]["schema"][
-                        "message"
-                    ].append(f"An unexpected error occurred: {str(e)}")
-
-            if run_validator:
-                validator = JSONValidator(json_data)
-                validation_results = validator.validate()
-                result_dict[i]["validator"] = validation_results
-
+        for i, (json_data, result) in enumerate(processed):
+            updated_json_list.append(json_data)
+            result_dict[i] = result
         return updated_json_list, result_dict
 
+    def iter_scripts(
+        self, run_schema=True, run_standardizer=True, run_validator=True, timeout=None
+    ):
+        """
+        Lazily process self.json_list (which may be any iterable, i.e. a stream of
+        entries) one entry at a time in this process.
+
+        Yields:
+            tuple: (json_data, result) for each entry, in order.
+        """
+        for json_data in self.json_list:
+            yield self._process_entry(
+                json_data, run_schema, run_standardizer, run_validator, timeout
+            )
+
+    def _worker_engines(self):
+        """Engines to hand to worker processes (None where the default engine is used)."""
+        return (
+            None
+            if self.standardizer_engine is standardizer.get_default_engine()
+            else self.standardizer_engine,
+            None
+            if self.validator_engine is validator.get_default_engine()
+            else self.validator_engine,
+        )
+
+    def _process_entry(self, json_data, run_schema, run_standardizer, run_validator, timeout):
+        """Runs every enabled step on a single entry. Returns (json_data, result)."""
+        result = {}
+        result["inchikey"] = json_data.get("inchikey", "")
+        result["source"] = json_data.get("submission", {}).get("source", "")
+        result["type"] = json_data.get("submission", {}).get("type", "")
+
+        original_json_data = json_data
+        if timeout is not None and run_standardizer:
+            # Standardize a copy so a timed out entry is handed back untouched
+            json_data = copy.deepcopy(json_data)
+        try:
+            with entry_timeout(timeout):
+                json_data = self._run_steps(
+                    json_data, result, run_schema, run_standardizer, run_validator
+                )
+        except EntryTimeoutError as e:
+            result["error"] = str(e)
+            return original_json_data, result
+        return json_data, result
+
+    def _run_steps(self, json_data, result, run_schema, run_standardizer, run_validator):
+        if run_standardizer:
+            (
+                json_data,
+                standardizer_notes,
+            ) = self.standardizer_engine.standardize(json_data)
+            result["standardizer_notes"] = standardizer_notes.format()
+
+        if run_schema:
+            result["schema"] = {}
+            result["schema"]["valid"] = False
+            result["schema"]["message"] = []
+
+            try:
+                # The exchange schema is loaded (and compiled) on first use
+                schema_validator = get_schema_validator(compiled=True)
+                for error in schema_validator.iter_errors(json_data):
+                    result["schema"]["message"].append(format_schema_error(error))
+                if not result["schema"]["message"]:
+                    result["schema"]["valid"] = True
+            except Exception as e:
+                if is_schema_error(e):
+                    result["schema"]["message"].append(f"Schema error: {e}")
+                else:
+                    result["schema"]["message"].append(
+                        f"An unexpected error occurred: {str(e)}"
+                    )
+
+        if run_validator:
+            validation_results = self.validator_engine.validate(
+                json_data, legacy_message=True
+            )
+            result["validator"] = validation_results
+
+        return json_data
+
     if __name__ == "__main__":
         if len(sys.argv) != 2:
             print("Usage: python script.py <json_file>")
@@ -78,11 +262,10 @@ class ScriptConsolidator:
             json_file_path = sys.argv[1]
 
             try:
-                with open(json_file_path, "r") as file:
-                    json_data = json.load(file)
+                json_data = json_io.load_file(json_file_path)
             except FileNotFoundError:
                 print(f"JSON not found: {json_data}")
-            except json.JSONDecodeError:
+            except json_io.JSONDecodeError:
                 print(f"Provided JSON is invalid: {json_data}")
 
             standardizer = JSONStandardizer(json_data)
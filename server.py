@@ -0,0 +1,224 @@
+import sys
+import os
+import errno
+import stat
+import time
+import traceback
+import socketserver
+from contextlib import redirect_stdout
+
+from . import json_io
+from .script_consolidator import ScriptConsolidator
+from .standardization import standardizer
+from .standardization.lookup_tables import LOOKUP_TABLE_FILES, get_lookup_table
+from .validation import validator
+from .validation.schema_validator import get_schema_validator
+from .conversion.curator_conversion.npmrd_curator_converter import CuratorConverter
+
+
+class RequestError(Exception):
+    """Raised for malformed requests. Reported back to the caller as an error response."""
+
+
+def _standardize(request):
+    standardized_data, notes = standardizer.get_default_engine().standardize(
+        _require(request, "data")
+    )
+    return {"data": standardized_data, "notes": notes.format()}
+
+
+def _validate(request):
+    data = _require(request, "data")
+    entries = [data] if isinstance(data, dict) else data
+    updated_json_list, result_dict = ScriptConsolidator(entries).run_scripts(
+        run_schema=request.get("schema", True),
+        run_standardizer=request.get("standardize", False),
+        run_validator=True,
+    )
+    results = [result_dict[i] for i in range(len(entries))]
+    response = {"results": results if isinstance(data, list) else results[0]}
+    if request.get("standardize", False):
+        response["data"] = updated_json_list if isinstance(data, list) else updated_json_list[0]
+    return response
+
+
+def _convert(request):
+    converted_json_list, status = CuratorConverter(_require(request, "data")).convert_json()
+    return {"data": converted_json_list, "status": status}
+
+
+def _align(request):
+    # RDKit is only imported once an alignment is requested
+    from .alignment.align import MolBlockAligner
+
+    aligner = MolBlockAligner(
+        _require(request, "curation_mol_block"), _require(request, "db_mol_block")
+    )
+    c_aligned, h_aligned = aligner.align(request.get("c_values"), request.get("h_values"))
+    return {"c_values": c_aligned, "h_values": h_aligned}
+
+
+def _ping(request):
+    return {"pid": os.getpid()}
+
+
+# op -> handler taking the request dictionary and returning the "result"
+OPERATIONS = {
+    "standardize": _standardize,
+    "validate": _validate,
+    "convert": _convert,
+    "align": _align,
+    "ping": _ping,
+}
+
+
+def _require(request, field):
+    if field not in request:
+        raise RequestError(f"Missing '{field}' in '{request.get('op')}' request")
+    return request[field]
+
+
+def warm_up():
+    """
+    Build everything the operations share (engines, compiled schema validator, converter
+    templates, lookup tables) so the first request does not pay for it.
+    """
+    standardizer.get_default_engine()
+    validator.get_default_engine()
+    get_schema_validator(compiled=True)
+    CuratorConverter([]).get_templates()
+    for table_name in LOOKUP_TABLE_FILES:
+        get_lookup_table(table_name)
+
+
+def handle_request(line):
+    """
+    Handle one framed request: a single line holding a JSON object with an "op" (see
+    OPERATIONS), an optional "id" echoed back in the response, and the fields of the op.
+
+    Returns:
+        dict: the response with the fields...
+            id: the "id" of the request (None if not given)
+            ok (bool): whether the request succeeded
+            result (dict): the output of the op (if ok)
+            error (dict): "type" and "message" of the error (if not ok)
+            timings (dict): "parse_ms", "handle_ms" and "total_ms" for this request
+    """
+    start = time.perf_counter()
+    response = {"id": None, "ok": False}
+    parse_end = start
+    try:
+        try:
+            request = json_io.loads(line)
+        except json_io.JSONDecodeError as e:
+            raise RequestError(f"Request is not valid JSON: {e}") from None
+        if not isinstance(request, dict):
+            raise RequestError("Request must be a JSON object")
+        response["id"] = request.get("id")
+        parse_end = time.perf_counter()
+
+        operation = OPERATIONS.get(request.get("op"))
+        if operation is None:
+            raise RequestError(
+                f"Unknown op '{request.get('op')}', expected one of {sorted(OPERATIONS)}"
+            )
+        response["result"] = operation(request)
+        response["ok"] = True
+    except RequestError as e:
+        response["error"] = {"type": "RequestError", "message": str(e)}
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        response["error"] = {"type": type(e).__name__, "message": str(e)}
+
+    end = time.perf_counter()
+    response["timings"] = {
+        "parse_ms": round((parse_end - start) * 1000, 3),
+        "handle_ms": round((end - parse_end) * 1000, 3),
+        "total_ms": round((end - start) * 1000, 3),
+    }
+    return response
+
+
+def _encode_response(response):
+    return json_io.dumps_bytes(response, default=str) + b"\n"
+
+
+def serve_stdio(input_stream=None, output_stream=None):
+    """
+    Answer one JSON request per line of stdin with one JSON response line on stdout.
+    Both streams are binary (sys.stdin.buffer / sys.stdout.buffer by default) so
+    requests and responses are never converted to and from str.
+    """
+    input_stream = sys.stdin.buffer if input_stream is None else input_stream
+    output_stream = sys.stdout.buffer if output_stream is None else output_stream
+    # Anything the operations print (i.e. the aligner's progress messages) must not end
+    # up on stdout, which carries the responses. Requests are handled one at a time in
+    # this thread, so stdout is swapped once for the whole loop rather than per request
+    # (the socket server does not use stdout and handles requests in parallel threads)
+    with redirect_stdout(sys.stderr):
+        for line in input_stream:
+            if not line.strip():
+                continue
+            output_stream.write(_encode_response(handle_request(line)))
+            output_stream.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(_encode_response(handle_request(line)))
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _remove_stale_socket(socket_path):
+    """
+    Remove the socket left at socket_path by an earlier run. Anything other than a
+    socket is left alone (i.e. a file given as the socket path by mistake).
+
+    Raises:
+        FileExistsError: if socket_path exists but is not a socket.
+    """
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "Not a socket, refusing to replace it", socket_path)
+    os.remove(socket_path)
+
+
+def serve_unix_socket(socket_path):
+    """
+    Accept connections on a Unix socket, each handled in its own thread with the same
+    one-request-per-line protocol as serve_stdio. The engines are stateless and shared
+    by every connection.
+    """
+    _remove_stale_socket(socket_path)
+    with _UnixServer(socket_path, _RequestHandler) as server:
+        print(f"Listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def serve(socket_path=None):
+    """
+    Run the long-lived worker: warm everything up once, then serve requests over a Unix
+    socket if socket_path is given, otherwise over stdin / stdout.
+
+    Example request / response (one line each)
+        {"id": 1, "op": "validate", "data": {...exchange entry...}}
+        {"id": 1, "ok": true, "result": {"results": {...}}, "timings": {"parse_ms": 0.1, "handle_ms": 2.3, "total_ms": 2.4}}
+    """
+    warm_up()
+    if socket_path:
+        serve_unix_socket(socket_path)
+    else:
+        serve_stdio()
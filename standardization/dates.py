@@ -0,0 +1,66 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+DATE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f+00:00"
+# Number of distinct raw date strings remembered by the date rules. Entries from one
+# deposition session usually share the same few timestamps.
+DATE_CACHE_SIZE = 4096
+
+# Canonical and common ISO-8601 forms ("2023-08-17", "2023-08-17 23:34",
+# "2023-08-17T23:34:03.083182+00:00", "2023-08-17T23:34:03Z", ...). The offset is
+# accepted but, as with dateutil + DATE_TIME_FORMAT, not applied.
+_ISO_DATE_TIME_RE = re.compile(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})"
+    r"(?:[T ]([0-9]{2}):([0-9]{2})(?::([0-9]{2})(?:\.([0-9]{1,6}))?)?"
+    r"(?:Z|[+-](?:[01][0-9]|2[0-3])(?::?[0-5][0-9])?)?)?"
+)
+
+
+def _parse_iso_date_time(val):
+    """
+    Strict parser for the ISO-8601 forms matched by _ISO_DATE_TIME_RE. Returns None for
+    anything else so the caller can fall back to dateutil.
+    """
+    match = _ISO_DATE_TIME_RE.fullmatch(val)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction = match.groups()
+    try:
+        return datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int(fraction.ljust(6, "0")) if fraction else 0,
+        )
+    except ValueError:
+        return None
+
+
+def _parse_date_time(val):
+    """Parse a date string, trying the strict ISO-8601 fast path before dateutil."""
+    if isinstance(val, str):
+        parsed_val = _parse_iso_date_time(val)
+        if parsed_val is not None:
+            return parsed_val
+    # dateutil is only imported for the (rare) strings the fast path can not handle
+    from dateutil import parser
+
+    return parser.parse(val)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def standardize_date_time_string(val):
+    """Returns val in DATE_TIME_FORMAT. Raises the dateutil error if val can not be parsed."""
+    return _parse_date_time(val).strftime(DATE_TIME_FORMAT)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def standardize_date_string(val):
+    """Returns val in DATE_TIME_FORMAT with the time set to midnight."""
+    parsed_val = _parse_date_time(val)
+    midnight_date = parsed_val.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight_date.strftime(DATE_TIME_FORMAT)
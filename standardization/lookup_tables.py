@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from types import MappingProxyType
+
+try:
+    from .. import json_io
+except ImportError:
+    # Imported with the repo root on sys.path
+    import json_io
+
+current_dir = os.path.dirname(__file__)
+one_level_up = os.path.dirname(current_dir)
+standardization_files_dir = os.path.join(one_level_up, "standardization_files")
+
+LOOKUP_TABLE_FILES = {
+    "solvent": "solvent_standardizer.json",
+    "vendor": "vendor_standardizer.json",
+    "filetype": "filetype-name_standardizer.json",
+    "experiment": "experiment_standardizer.json",
+}
+
+
+class LookupTableRegistry:
+    """
+    Process-wide cache of the standardization lookup tables in "standardization_files".
+    Each table is read and parsed once and handed out as a read-only mapping shared by
+    every caller.
+
+    If reload_on_change is True the files are re-stat'ed (at most once every
+    check_interval seconds per table) and reloaded when their mtime or size changes.
+    Otherwise a table is never re-read once loaded.
+
+    Example usage
+        registry = LookupTableRegistry(reload_on_change=True)
+        solvent_table = registry.get("solvent")
+    """
+
+    def __init__(
+        self,
+        reload_on_change=False,
+        check_interval=1.0,
+        files_dir=standardization_files_dir,
+    ):
+        self.files_dir = files_dir
+        self.reload_on_change = reload_on_change
+        self.check_interval = check_interval
+        # name -> (table, (mtime, size), last_checked)
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+        Returns the lookup table registered under "name" (see LOOKUP_TABLE_FILES).
+
+        Returns:
+            MappingProxyType: read-only mapping of UPPERCASE input -> standardized value.
+        """
+        cached = self._tables.get(name)
+        if cached is not None:
+            table, stat_key, last_checked = cached
+            if not self.reload_on_change:
+                return table
+            now = time.monotonic()
+            if now - last_checked < self.check_interval:
+                return table
+            if self._stat_key(name) == stat_key:
+                self._tables[name] = (table, stat_key, now)
+                return table
+
+        with self._lock:
+            return self._load(name)
+
+    def clear(self):
+        """Drop every cached table so the next get() re-reads it from disk."""
+        with self._lock:
+            self._tables.clear()
+
+    def _path(self, name):
+        try:
+            return os.path.join(self.files_dir, LOOKUP_TABLE_FILES[name])
+        except KeyError:
+            raise KeyError(f"Unknown lookup table '{name}'") from None
+
+    def _stat_key(self, name):
+        stat = os.stat(self._path(name))
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, name):
+        stat_key = self._stat_key(name)
+        cached = self._tables.get(name)
+        # Another thread may have reloaded the table while we waited for the lock
+        if cached is not None and cached[1] == stat_key:
+            table = cached[0]
+        else:
+            table = MappingProxyType(json_io.load_file(self._path(name)))
+        self._tables[name] = (table, stat_key, time.monotonic())
+        return table
+
+
+default_registry = LookupTableRegistry()
+
+
+def get_lookup_table(name):
+    """
+    Returns a lookup table from the process-wide default registry. Hot reload can be
+    switched on for long running processes with "default_registry.reload_on_change = True".
+    """
+    return default_registry.get(name)
@@ -0,0 +1,132 @@
+from collections import namedtuple
+
+# Message templates, formatted only when a note is turned into text. Available fields
+# are those of StandardizationNote plus old_type / new_type.
+LOWERCASE = "'{field_path}': made lowercase '{old_value}' -> '{new_value}'"
+UPPERCASE = "'{field_path}': made uppercase '{old_value}' -> '{new_value}'"
+CORRECTED_NPMRD_ID = "'{field_path}': corrected npmrd_id format '{old_value}' = {old_type} -> '{new_value}' = {new_type}"
+SOLVENT_STANDARDIZED = "'{field_path}': solvent standardized '{old_value}' -> '{new_value}'"
+VENDOR_STANDARDIZED = "'{field_path}': vendor standardized '{old_value}' -> '{new_value}'"
+FILETYPE_STANDARDIZED = "'{field_path}': filetype standardized '{old_value}' -> '{new_value}'"
+MADE_INT = "'{field_path}': made int '{old_value}' = {old_type} -> '{new_value}' = {new_type}"
+MADE_FLOAT = "'{field_path}': made float '{old_value}' = {old_type} -> '{new_value}' = {new_type}"
+MADE_BOOL = "'{field_path}': made bool '{old_value}' = {old_type} -> '{new_value}' = {new_type}"
+DECIMAL_PLACES = "'{field_path}': adjusted to go to {detail} decimal places '{old_value}' = {old_type} -> '{new_value}' = {new_type}"
+ROUNDED_VALUES = "'{field_path}': adjusted {count} value(s) to go to {detail} decimal places"
+DATE_TIME_STANDARDIZED = "'{field_path}': standardized date/time format '{old_value}' = {old_type} -> '{new_value}' = {new_type}"
+DATE_STANDARDIZED = "'{field_path}': standardized date format '{old_value}' = {old_type} -> '{new_value}' = {new_type}"
+DATE_PARSE_FAILED = "'{field_path}': failed to parse date from '{old_value}' ({old_type}): {detail}"
+
+
+class StandardizationNote(
+    namedtuple(
+        "StandardizationNote",
+        ["field_path", "rule", "old_value", "new_value", "template", "detail", "count"],
+    )
+):
+    """
+    A single change made by a standardization rule. Stored as a compact tuple and only
+    rendered into the human readable message when str() is called on it.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.template.format(
+            old_type=type(self.old_value),
+            new_type=type(self.new_value),
+            **self._asdict(),
+        )
+
+    def to_dict(self):
+        """Structured form of the note (field path, rule id, old and new value)."""
+        note_dict = {
+            "field_path": self.field_path,
+            "rule": self.rule,
+            "old_value": self.old_value,
+            "new_value": self.new_value,
+        }
+        if self.count != 1:
+            note_dict["count"] = self.count
+        return note_dict
+
+
+class NoteLog:
+    """
+    Change log of a standardization run.
+
+    In "full" mode every note is kept. In "aggregate" mode only the number of changes
+    per (field_path, rule) and the first sample_size notes of each are kept, so memory
+    use stays flat no matter how many entries are standardized.
+
+    Example usage
+        notes = NoteLog(mode="aggregate")
+        engine.standardize(json_data_list, notes=notes)
+        notes.counts()    # {("submission.source", "lowercase"): 1520, ...}
+        notes.format()    # list of human readable messages
+    """
+
+    MODES = ("full", "aggregate")
+
+    def __init__(self, mode="full", sample_size=5):
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid note mode '{mode}', expected one of {self.MODES}")
+        self.mode = mode
+        self.sample_size = sample_size
+        self._notes = []
+        self._recorded = 0
+        self._counts = {}
+        self._samples = {}
+
+    def record(self, field_path, rule, old_value, new_value, template, detail=None, count=1):
+        """Record a change. Nothing is formatted here."""
+        key = (field_path, rule)
+        self._recorded += 1
+        self._counts[key] = self._counts.get(key, 0) + count
+        note = StandardizationNote(
+            field_path, rule, old_value, new_value, template, detail, count
+        )
+        if self.mode == "full":
+            self._notes.append(note)
+        else:
+            samples = self._samples.setdefault(key, [])
+            if len(samples) < self.sample_size:
+                samples.append(note)
+
+    def notes(self):
+        """Returns the kept notes (every note in "full" mode, the samples otherwise)."""
+        if self.mode == "full":
+            return list(self._notes)
+        return [note for samples in self._samples.values() for note in samples]
+
+    def counts(self):
+        """Returns the number of changes made per (field_path, rule)."""
+        return dict(self._counts)
+
+    def format(self):
+        """
+        Render the log into human readable messages. In "aggregate" mode each
+        (field_path, rule) gets a summary line followed by its sample messages.
+        """
+        if self.mode == "full":
+            return [str(note) for note in self._notes]
+
+        messages = []
+        for (field_path, rule), count in self._counts.items():
+            messages.append(f"'{field_path}': {rule} applied to {count} value(s)")
+            messages.extend(str(note) for note in self._samples.get((field_path, rule), []))
+        return messages
+
+    def to_list(self):
+        """Returns the kept notes as JSON friendly dictionaries."""
+        return [note.to_dict() for note in self.notes()]
+
+    def __iter__(self):
+        return iter(self.notes())
+
+    def __len__(self):
+        """Number of notes recorded (including those not kept in "aggregate" mode)."""
+        return self._recorded
+
+    def __bool__(self):
+        return bool(self._counts)
@@ -0,0 +1,119 @@
+from itertools import chain
+
+try:
+    from .notes import ROUNDED_VALUES
+except ImportError:
+    from notes import ROUNDED_VALUES
+
+
+# Below this many values the NumPy call overhead outweighs the plain Python loop
+VECTORIZE_MIN_VALUES = 32
+# Doubles at or above 2**52 are already whole numbers
+_INTEGRAL_LIMIT = 2.0**52
+
+
+_np = False
+
+
+def _numpy():
+    """Imports NumPy on first use (None if it is not installed)."""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
+
+
+def is_numeric_list(values):
+    """True if every entry is a plain int or float (bools and nested lists excluded)."""
+    return all(type(val) is float or type(val) is int for val in values)
+
+
+def round_values(values, decimal_places):
+    """
+    Returns [float(round(val, decimal_places)) for val in values], using a single NumPy
+    operation for longer lists when NumPy is installed.
+
+    np.round scales by 10**decimal_places before rounding, so it can disagree with
+    Python's correctly rounded round() when the scaled value lands within rounding
+    error of a .5 boundary (or overflows). Those few values are recomputed with round()
+    so the result is identical to the pure Python path.
+
+    Args:
+        values (list): ints and floats.
+        decimal_places (int): number of decimal places to keep.
+
+    Returns:
+        list: rounded floats.
+    """
+    np = _numpy() if len(values) >= VECTORIZE_MIN_VALUES else None
+    if np is None:
+        return [float(round(val, decimal_places)) for val in values]
+
+    array = np.asarray(values, dtype=np.float64)
+    scale = 10.0**decimal_places
+    with np.errstate(over="ignore", invalid="ignore"):
+        scaled = array * scale
+        rounded = np.rint(scaled) / scale
+        distance_from_half = np.abs(scaled - np.floor(scaled) - 0.5)
+        suspect = ~np.isfinite(scaled) | (np.abs(scaled) >= _INTEGRAL_LIMIT)
+        suspect |= distance_from_half <= np.abs(scaled) * 4.5e-16
+
+    rounded_list = rounded.tolist()
+    for index in np.flatnonzero(suspect).tolist():
+        rounded_list[index] = float(round(values[index], decimal_places))
+    return rounded_list
+
+
+class RoundingBatch:
+    """
+    Collects the numeric lists targeted by "decimal_places-N" rules during a
+    standardization run so that every list sharing the same N can be rounded together
+    in one round_values call. flush() writes the rounded lists back and records one
+    summary note per field path instead of one note per value.
+    """
+
+    def __init__(self):
+        # decimal_places -> list of (container, key, field_path)
+        self._jobs = {}
+
+    def add(self, container, key, field_path, decimal_places):
+        self._jobs.setdefault(decimal_places, []).append((container, key, field_path))
+
+    def flush(self, notes):
+        jobs_by_decimal_places = self._jobs
+        self._jobs = {}
+        for decimal_places, jobs in jobs_by_decimal_places.items():
+            value_lists = [container[key] for container, key, _ in jobs]
+            rounded = round_values(list(chain.from_iterable(value_lists)), decimal_places)
+
+            changed_by_field = {}
+            offset = 0
+            for (container, key, field_path), values in zip(jobs, value_lists):
+                new_list = rounded[offset:offset + len(values)]
+                offset += len(values)
+                changed = 0
+                for index, (val, new_val) in enumerate(zip(values, new_list)):
+                    # Values that round to 0.0 are left as they were (as the per value
+                    # rule does, since 0.0 is falsy)
+                    if not new_val:
+                        new_list[index] = val
+                    elif val != new_val:
+                        changed += 1
+                container[key] = new_list
+                changed_by_field[field_path] = changed_by_field.get(field_path, 0) + changed
+
+            for field_path, changed in changed_by_field.items():
+                if changed:
+                    notes.record(
+                        field_path,
+                        f"decimal_places-{decimal_places}",
+                        None,
+                        None,
+                        ROUNDED_VALUES,
+                        detail=decimal_places,
+                        count=changed,
+                    )
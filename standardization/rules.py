@@ -0,0 +1,259 @@
+from datetime import datetime, date, time
+from functools import partial
+
+try:
+    from .dates import DATE_TIME_FORMAT, standardize_date_string, standardize_date_time_string
+    from .notes import (
+        LOWERCASE,
+        UPPERCASE,
+        CORRECTED_NPMRD_ID,
+        SOLVENT_STANDARDIZED,
+        VENDOR_STANDARDIZED,
+        FILETYPE_STANDARDIZED,
+        MADE_INT,
+        MADE_FLOAT,
+        MADE_BOOL,
+        DECIMAL_PLACES,
+        DATE_TIME_STANDARDIZED,
+        DATE_STANDARDIZED,
+        DATE_PARSE_FAILED,
+    )
+except ImportError:
+    from dates import DATE_TIME_FORMAT, standardize_date_string, standardize_date_time_string
+    from notes import (
+        LOWERCASE,
+        UPPERCASE,
+        CORRECTED_NPMRD_ID,
+        SOLVENT_STANDARDIZED,
+        VENDOR_STANDARDIZED,
+        FILETYPE_STANDARDIZED,
+        MADE_INT,
+        MADE_FLOAT,
+        MADE_BOOL,
+        DECIMAL_PLACES,
+        DATE_TIME_STANDARDIZED,
+        DATE_STANDARDIZED,
+        DATE_PARSE_FAILED,
+    )
+
+
+class RuleRegistry:
+    """
+    Maps the rule names used in a rules table (i.e. STANDARDIZATION_RULES) to the
+    functions implementing them.
+
+    Every rule function is called as
+        func(val, notes, field_path=..., rule=..., lookup_tables=..., **params)
+    and returns the standardized value (a falsy return leaves the field unchanged).
+    Changes are recorded with notes.record(...) (see notes.py).
+
+    A parameterized rule is registered with a "param" name and is referenced in a rules
+    table as "<name>-<value>" (i.e. "decimal_places-4"). The value is parsed once with
+    param_type when the rule is resolved, so nothing is re-parsed per value.
+
+    Example usage
+        @register_rule("kelvin_to_celsius")
+        def kelvin_to_celsius(val, notes, field_path, rule, lookup_tables):
+            return round(float(val) - 273.15, 2)
+
+        engine = StandardizerEngine(rules={"nmr_data.peak_lists.temperature": "kelvin_to_celsius"})
+    """
+
+    def __init__(self, rules=None):
+        # name -> (func, param, param_type)
+        self._rules = dict(rules._rules) if rules is not None else {}
+
+    def register(self, name, func=None, param=None, param_type=int):
+        """
+        Register func under name. Can also be used as a decorator when func is omitted.
+        Registering an existing name replaces the previous rule.
+        """
+        if func is None:
+            return lambda decorated: self.register(name, decorated, param, param_type)
+        self._rules[name] = (func, param, param_type)
+        return func
+
+    def resolve(self, rule):
+        """
+        Returns (func, params) for a rule name from a rules table. Raises ValueError for
+        unknown rules and malformed parameters.
+        """
+        if rule in self._rules:
+            func, param, param_type = self._rules[rule]
+            if param is None:
+                return func, {}
+            raise ValueError(f"Rule '{rule}' requires a '{param}' parameter ('{rule}-<{param}>')")
+
+        name, _, value = rule.rpartition("-")
+        if name in self._rules and self._rules[name][1] is not None:
+            func, param, param_type = self._rules[name]
+            try:
+                return func, {param: param_type(value)}
+            except ValueError:
+                raise ValueError(f"Invalid '{param}' parameter in rule '{rule}'") from None
+        raise ValueError(f"Unknown standardization rule '{rule}'")
+
+    def __contains__(self, name):
+        return name in self._rules
+
+    def names(self):
+        return list(self._rules)
+
+
+default_rules = RuleRegistry()
+
+
+def register_rule(name, func=None, param=None, param_type=int):
+    """
+    Register a rule in the process-wide default registry. Engines compile their rules
+    when they are built, so register custom rules before building an engine.
+    """
+    return default_rules.register(name, func, param, param_type)
+
+
+@register_rule("lowercase")
+def lowercase(val, notes, field_path, rule, lookup_tables):
+    # For string to be lowercase
+    new_val = val.lower()
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, LOWERCASE)
+    return new_val
+
+
+@register_rule("uppercase")
+def uppercase(val, notes, field_path, rule, lookup_tables):
+    # Force string to be uppercase
+    new_val = val.upper()
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, UPPERCASE)
+    return new_val
+
+
+@register_rule("standardize_experiment")
+def standardize_experiment(val, notes, field_path, rule, lookup_tables):
+    return
+
+
+@register_rule("correct_npmrd_id")
+def correct_npmrd_id(val, notes, field_path, rule, lookup_tables):
+    new_val = val
+    if isinstance(val, str):
+        if val.startswith("NP") and val[2:].isdigit() and len(val) == 9:
+            pass  # Input is already in the correct format
+        elif val.isdigit():
+            new_val = f"NP{val.zfill(7)}"
+    elif isinstance(val, (int, float)):
+        new_val = f"NP{int(val):07d}"
+
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, CORRECTED_NPMRD_ID)
+    return new_val
+
+
+def _standardize_from_table(val, notes, field_path, rule, lookup_tables, table, template):
+    # Convert known names to the standardized name in the lookup table
+    standardizer_json = lookup_tables.get(table)
+    if val.upper() in standardizer_json:
+        new_val = standardizer_json[val.upper()]
+        if val != new_val:
+            notes.record(field_path, rule, val, new_val, template)
+        return new_val
+    else:
+        return val
+
+
+register_rule(
+    "standardize_solvent",
+    partial(_standardize_from_table, table="solvent", template=SOLVENT_STANDARDIZED),
+)
+register_rule(
+    "standardize_vendor",
+    partial(_standardize_from_table, table="vendor", template=VENDOR_STANDARDIZED),
+)
+register_rule(
+    "standardize_filetype",
+    partial(_standardize_from_table, table="filetype", template=FILETYPE_STANDARDIZED),
+)
+
+
+@register_rule("make_int")
+def make_int(val, notes, field_path, rule, lookup_tables):
+    # Convert to int
+    new_val = int(val)
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, MADE_INT)
+    return new_val
+
+
+@register_rule("make_float")
+def make_float(val, notes, field_path, rule, lookup_tables):
+    # Convert to float
+    new_val = float(val)
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, MADE_FLOAT)
+    return new_val
+
+
+@register_rule("make_bool")
+def make_bool(val, notes, field_path, rule, lookup_tables):
+    # Convert to bool of True, False, or None
+    new_val = val
+    if isinstance(val, bool):
+        pass
+    elif isinstance(val, int):
+        new_val = bool(val)
+    elif isinstance(val, str):
+        val_str = val.lower().strip()
+        if val_str in ["true", "1"]:
+            new_val = True
+        elif val in ["false", "0"]:
+            new_val = False
+        else:
+            new_val = None
+
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, MADE_BOOL)
+    return new_val
+
+
+@register_rule("decimal_places", param="decimal_places")
+def round_decimal_places(val, notes, field_path, rule, lookup_tables, decimal_places):
+    # i.e. "decimal_places-2" will limit to 2 decimals places
+    if type(val) == list:
+        new_val = [float(round(val_entry, decimal_places)) for val_entry in val]
+    else:
+        new_val = float(round(val, decimal_places))
+
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, DECIMAL_PLACES, detail=decimal_places)
+    return new_val
+
+
+@register_rule("standardize_date_time")
+def standardize_date_time(val, notes, field_path, rule, lookup_tables):
+    # Convert date to standardized format
+    new_val = standardize_date_time_string(val)
+    if val != new_val:
+        notes.record(field_path, rule, val, new_val, DATE_TIME_STANDARDIZED)
+    return new_val
+
+
+@register_rule("standardize_date")
+def standardize_date(val, notes, field_path, rule, lookup_tables):
+    # Convert date to standardized format and remove time (retain only date)
+    if isinstance(val, datetime):
+        midnight_date = val.replace(hour=0, minute=0, second=0, microsecond=0)
+        new_val = midnight_date.strftime(DATE_TIME_FORMAT)
+    elif isinstance(val, date):
+        midnight_date = datetime.combine(val, time.min)
+        new_val = midnight_date.strftime(DATE_TIME_FORMAT)
+    else:
+        try:
+            new_val = standardize_date_string(str(val))
+        except Exception as e:
+            notes.record(field_path, rule, val, None, DATE_PARSE_FAILED, detail=str(e))
+            return val  # or return None if failure should null it out
+
+    if str(val) != new_val:
+        notes.record(field_path, rule, val, new_val, DATE_STANDARDIZED)
+    return new_val
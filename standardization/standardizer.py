@@ -1,302 +1,307 @@
 import sys
-import json
-from datetime import datetime, date, time
-from dateutil import parser
-import traceback
 import os
+from functools import lru_cache, partial
+import threading
+import traceback
 
-current_dir = os.path.dirname(__file__)
-one_level_up = os.path.dirname(current_dir)
-standardization_files_dir = os.path.join(one_level_up, "standardization_files")
+try:
+    from .. import json_io
+except ImportError:
+    try:
+        # Imported with the repo root on sys.path (i.e. "python -m standardization.standardizer")
+        import json_io
+    except ImportError:
+        # Run directly as a script ("python standardization/standardizer.py")
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import json_io
+
+try:
+    from .lookup_tables import default_registry
+    from .rounding import RoundingBatch, is_numeric_list
+    from .notes import NoteLog
+    from .rules import default_rules, round_decimal_places
+except ImportError:
+    # Run directly as a script ("python standardization/standardizer.py")
+    from lookup_tables import default_registry
+    from rounding import RoundingBatch, is_numeric_list
+    from notes import NoteLog
+    from rules import default_rules, round_decimal_places
+
+
+STANDARDIZATION_RULES = {
+    "npmrd_id": "correct_npmrd_id",
+    "submission.source": "lowercase",
+    "submission.type": "lowercase",
+    "submission.submission_date": "standardize_date_time",
+    "submission.embargo_status": "lowercase",
+    "submission.embargo_date": "standardize_date",
+    "citation.pmid": "make_int",
+    "origin.private_collection.compound_source_type": "lowercase",
+    "depositor_info.email": "lowercase",
+    "depositor_info.account_id": "make_int",
+    "depositor_info.show_email_in_attribution": "make_bool",
+    "depositor_info.show_name_in_attribution": "make_bool",
+    "depositor_info.show_organization_in_attribution": "make_bool",
+    "nmr_data.peak_lists.solvent": "standardize_solvent",
+    "nmr_data.peak_lists.values": "decimal_places-4",
+    "nmr_data.peak_lists.temperature": "decimal_places-1",
+    "nmr_data.peak_lists.frequency": "decimal_places-5",
+    "nmr_data.experimental_data.nmr_metadata.vendor": "standardize_vendor",
+    "nmr_data.experimental_data.nmr_metadata.filetype": "standardize_filetype",
+    "nmr_data.experimental_data.nmr_metadata.temperature": "decimal_places-1",
+}
+
+
+@lru_cache(maxsize=None)
+def _split_field_path(field_path):
+    """Split a dotted rule path once into (parent_parts, target_field)."""
+    path_parts = tuple(field_path.split("."))
+    return path_parts[:-1], path_parts[-1]
+
+
+class CompiledRule:
+    """
+    A single entry of StandardizerEngine.rules resolved ahead of time: the dotted field
+    path is pre-split into the parent keys to descend through and the target field,
+    and the rule is looked up in the rule registry and bound (with any parameter, i.e.
+    the N of "decimal_places-N") into a callable taking only the value to standardize.
+    """
+
+    __slots__ = ("field_path", "rule", "parents", "target", "apply", "decimal_places")
+
+    def __init__(self, field_path, rule, rule_registry, lookup_tables):
+        self.field_path = field_path
+        self.rule = rule
+        self.parents, self.target = _split_field_path(field_path)
+        func, params = rule_registry.resolve(rule)
+        # Set for the built-in "decimal_places-N" rule so numeric lists can be rounded
+        # in batches
+        self.decimal_places = (
+            params["decimal_places"] if func is round_decimal_places else None
+        )
+        # Called as apply(val, notes)
+        self.apply = partial(
+            func, field_path=field_path, rule=rule, lookup_tables=lookup_tables, **params
+        )
+
+
+class RuleTrieNode:
+    """
+    Node of the trie built from every compiled rule path. "children" maps a key to the
+    node one level deeper and "rules" holds the rules targeting the value at this node.
+    """
+
+    __slots__ = ("children", "rules")
+
+    def __init__(self):
+        self.children = {}
+        self.rules = []
+
+
+def build_rule_trie(compiled_rules):
+    """Merge the paths of a list of CompiledRule into a single RuleTrieNode tree."""
+    root = RuleTrieNode()
+    for compiled_rule in compiled_rules:
+        node = root
+        for part in compiled_rule.parents + (compiled_rule.target,):
+            if part not in node.children:
+                node.children[part] = RuleTrieNode()
+            node = node.children[part]
+        node.rules.append(compiled_rule)
+    return root
+
+
+class StandardizerEngine:
+    """
+    Stateless standardization engine. The rule table is compiled into a trie once when
+    the engine is built; after that "standardize" keeps all per-run state (the notes)
+    local to the call, so a single engine can be reused for every entry and shared
+    between threads.
+
+    Notes are recorded as structured StandardizationNote tuples in a NoteLog and only
+    formatted into messages on request. With notes_mode="aggregate" only per field
+    counts and a few samples are kept (see notes.py).
+
+    Example usage
+        engine = StandardizerEngine()
+        standardized_entry, notes = engine.standardize(entry)
+        messages = notes.format()
+    """
+
+    def __init__(
+        self,
+        rules=None,
+        lookup_tables=None,
+        batch_rounding=True,
+        notes_mode="full",
+        rule_registry=None,
+    ):
+        self.rules = dict(STANDARDIZATION_RULES if rules is None else rules)
+        # Rule name -> function (see rules.py). Custom rules can be added with
+        # register_rule() before the engine is built
+        self.rule_registry = default_rules if rule_registry is None else rule_registry
+        # Shared, read-only tables loaded once per process (see lookup_tables.py)
+        self.lookup_tables = default_registry if lookup_tables is None else lookup_tables
+        # If True the numeric lists of every entry in a standardize call are rounded
+        # together, otherwise they are rounded entry by entry
+        self.batch_rounding = batch_rounding
+        self.notes_mode = notes_mode
+        self._rule_trie = build_rule_trie(self._compile_rules())
+
+    def _compile_rules(self):
+        """Resolve self.rules into a plan of CompiledRule accessors."""
+        return [
+            CompiledRule(field_path, rule, self.rule_registry, self.lookup_tables)
+            for field_path, rule in self.rules.items()
+        ]
+
+    def _apply_rule(self, current, target_field, compiled_rule, notes, rounding_batch):
+        """Apply a compiled rule to current[target_field] (to each entry if it is a list)."""
+        # If target_field is a list then apply the rule to each entry
+        if type(current[target_field]) == list:
+            # Numeric lists are rounded together once the walk is done
+            if compiled_rule.decimal_places is not None and is_numeric_list(
+                current[target_field]
+            ):
+                rounding_batch.add(
+                    current,
+                    target_field,
+                    compiled_rule.field_path,
+                    compiled_rule.decimal_places,
+                )
+                return
 
-solv_standardizer_path = os.path.join(
-    standardization_files_dir, "solvent_standardizer.json"
-)
-vendor_standardizer_path = os.path.join(
-    standardization_files_dir, "vendor_standardizer.json"
-)
-filetype_standardizer_path = os.path.join(
-    standardization_files_dir, "filetype-name_standardizer.json"
-)
+            new_list = []
+            for target_field_entry in current[target_field]:
+                new_val = compiled_rule.apply(target_field_entry, notes)
+                if new_val:
+                    new_list.append(new_val)
+                else:
+                    new_list.append(target_field_entry)
+            current[target_field] = new_list
 
+        # Else run on the target_field value directly
+        else:
+            new_val = compiled_rule.apply(current[target_field], notes)
+            if new_val:
+                current[target_field] = new_val
 
-class JSONStandardizer:
-    def __init__(self, json_dict):
-        self.json_data = json_dict
-        self.notes = []
-        self.rules = {
-            "npmrd_id": "correct_npmrd_id",
-            "submission.source": "lowercase",
-            "submission.type": "lowercase",
-            "submission.submission_date": "standardize_date_time",
-            "submission.embargo_status": "lowercase",
-            "submission.embargo_date": "standardize_date",
-            "citation.pmid": "make_int",
-            "origin.private_collection.compound_source_type": "lowercase",
-            "depositor_info.email": "lowercase",
-            "depositor_info.account_id": "make_int",
-            "depositor_info.show_email_in_attribution": "make_bool",
-            "depositor_info.show_name_in_attribution": "make_bool",
-            "depositor_info.show_organization_in_attribution": "make_bool",
-            "nmr_data.peak_lists.solvent": "standardize_solvent",
-            "nmr_data.peak_lists.values": "decimal_places-4",
-            "nmr_data.peak_lists.temperature": "decimal_places-1",
-            "nmr_data.peak_lists.frequency": "decimal_places-5",
-            "nmr_data.experimental_data.nmr_metadata.vendor": "standardize_vendor",
-            "nmr_data.experimental_data.nmr_metadata.filetype": "standardize_filetype",
-            "nmr_data.experimental_data.nmr_metadata.temperature": "decimal_places-1",
-        }
-
-        with open(solv_standardizer_path, "r") as solv_json_file:
-            self.solv_standardizer_json = json.load(solv_json_file)
-        with open(vendor_standardizer_path, "r") as vendor_json_file:
-            self.vendor_standardizer_json = json.load(vendor_json_file)
-        with open(filetype_standardizer_path, "r") as filetype_json_file:
-            self.filetype_standardizer_json = json.load(filetype_json_file)
-
-    def _run_rule(self, current, val, field_path, rule):
-        # Check if the target field exists and apply the specified rule
-        if rule == "lowercase":
-            # For string to be lowercase
-            new_val = val.lower()
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': made lowercase '{val}' -> '{new_val}'"
-                )
-            return new_val
-
-        elif rule == "uppercase":
-            # Force string to be uppercase
-            new_val = val.upper()
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': made uppercase '{val}' -> '{new_val}'"
-                )
-            return new_val
-
-        elif rule == "standardize_experiment":
-            pass
-
-        elif rule == "correct_npmrd_id":
-            new_val = val
-            if isinstance(val, str):
-                if val.startswith("NP") and val[2:].isdigit() and len(val) == 9:
-                    pass  # Input is already in the correct format
-                elif val.isdigit():
-                    new_val = f"NP{val.zfill(7)}"
-            elif isinstance(val, (int, float)):
-                new_val = f"NP{int(val):07d}"
-
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': corrected npmrd_id format '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                )
-            return new_val
-
-        elif rule == "standardize_solvent":
-            # Convert known solvents to standardized format
-            if val.upper() in self.solv_standardizer_json.keys():
-                new_val = self.solv_standardizer_json[val.upper()]
-                if val != new_val:
-                    self.notes.append(
-                        f"'{field_path}': solvent standardized '{val}' -> '{new_val}'"
-                    )
-                return new_val
-            else:
-                return val
-
-        elif rule == "standardize_vendor":
-            # Convert known vendor names to standardized format
-            if val.upper() in self.vendor_standardizer_json.keys():
-                new_val = self.vendor_standardizer_json[val.upper()]
-                if val != new_val:
-                    self.notes.append(
-                        f"'{field_path}': made int '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                    )
-                return new_val
-            else:
-                return val
-
-        elif rule == "standardize_filetype":
-            # Convert known vendor names to standardized format
-            if val.upper() in self.filetype_standardizer_json.keys():
-                new_val = self.filetype_standardizer_json[val.upper()]
-                if val != new_val:
-                    self.notes.append(
-                        f"'{field_path}': filetype standardized '{val}' -> '{new_val}'"
-                    )
-                return new_val
-            else:
-                return val
-
-        elif rule == "make_int":
-            # Convert to int
-            new_val = int(val)
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': made int '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                )
-            return new_val
-
-        elif rule == "make_float":
-            # Convert to float
-            new_val = float(val)
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': made float '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                )
-            return new_val
-
-        elif rule == "make_bool":
-            # Convert to bool of True, False, or None
-            new_val = val
-            if isinstance(val, bool):
-                pass
-            elif isinstance(val, int):
-                new_val = bool(val)
-            elif isinstance(val, str):
-                val_str = val.lower().strip()
-                if val_str in ["true", "1"]:
-                    new_val = True
-                elif val in ["false", "0"]:
-                    new_val = False
+    def _traverse_json(self, json_data, node, notes, rounding_batch):
+        """
+        Walk json_data once, depth first, following only the keys present in the rule
+        trie. Every rule whose path ends at a visited field is applied on the way, so
+        each part of an entry is visited once no matter how many rules share its path.
+        Lists of dicts found along the way are fanned out with each entry walked.
+        """
+        for key, child in node.children.items():
+            if key not in json_data:
+                continue
+
+            # run rules if field exists and is not None
+            if child.rules and json_data[key] is not None:
+                for compiled_rule in child.rules:
+                    self._apply_rule(json_data, key, compiled_rule, notes, rounding_batch)
+
+            if child.children:
+                current = json_data[key]
+                if type(current) == dict:
+                    self._traverse_json(current, child, notes, rounding_batch)
+                # If entry is a list of dicts then traverse each entry
+                elif type(current) == list and current and type(current[0]) == dict:
+                    for current_entry in current:
+                        if type(current_entry) == dict:
+                            self._traverse_json(current_entry, child, notes, rounding_batch)
+
+    def _standardize_entry(self, json_data, notes, rounding_batch):
+        """Standardize a single compound dictionary in place."""
+        for key, value in json_data.items():
+            # Trim whitespace from all str entries
+            if isinstance(value, str):
+                strip_value = value.strip()
+                if strip_value == "":
+                    json_data[key] = None
                 else:
-                    new_val = None
+                    json_data[key] = strip_value
 
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': made bool '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                )
-            return new_val
-
-        elif rule.startswith("decimal_places"):
-            # Specify how many decimal places to use after the "-""
-            # i.e. "decimal_places-2" will limit to 2 decimals places
-            path_parts = rule.split("-")
-
-            if type(val) == list:
-                new_val = []
-                for val_entry in val:
-                    new_val.append(float(round(val_entry, int(path_parts[-1]))))
-            else:
-                new_val = float(round(val, int(path_parts[-1])))
-
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': adjusted to go to {path_parts[-1]} decimal places '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                )
-            return new_val
-
-        elif rule == "standardize_date_time":
-            # Convert date to standardized format
-            new_val = parser.parse(val).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
-            if val != new_val:
-                self.notes.append(
-                    f"'{field_path}': standardized date/time format '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                )
-            return new_val
-
-        elif rule == "standardize_date":
-            # Convert date to standardized format and remove time (retain only date)
-            if isinstance(val, datetime):
-                midnight_date = val.replace(hour=0, minute=0, second=0, microsecond=0)
-            elif isinstance(val, date):
-                midnight_date = datetime.combine(val, time.min)
-            else:
-                try:
-                    parsed_val = parser.parse(str(val))
-                    midnight_date = parsed_val.replace(hour=0, minute=0, second=0, microsecond=0)
-                except Exception as e:
-                    self.notes.append(f"'{field_path}': failed to parse date from '{val}' ({type(val)}): {e}")
-                    return val  # or return None if failure should null it out
-
-            new_val = midnight_date.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
-            if str(val) != new_val:
-                self.notes.append(
-                    f"'{field_path}': standardized date format '{val}' = {type(val)} -> '{new_val}' = {type(new_val)}"
-                )
-            return new_val
+        # Apply "rules" to appropriate fields in json
+        self._traverse_json(json_data, self._rule_trie, notes, rounding_batch)
+        if not self.batch_rounding:
+            rounding_batch.flush(notes)
+        return json_data
 
-        return
+    def standardize(self, json_data, notes=None):
+        """
+        Standardize an NP-MRD Exchange JSON in place.
 
-    def _traverse_json(self, json_data, field_path, rule):
-        # Split the field path into parts based on dot notation
-        path_parts = field_path.split(".")
+        Args:
+            json_data (list or dict): list of compound dictionaries, or a single one.
+            notes (NoteLog): optional log to record into, e.g. to share one aggregate
+                log across several calls. A new NoteLog(self.notes_mode) by default.
+
+        Returns:
+            tuple: (json_data, notes) where json_data is the standardized input (same
+            shape as provided) and notes is the NoteLog of the changes made.
+        """
+        if notes is None:
+            notes = NoteLog(mode=self.notes_mode)
+        rounding_batch = RoundingBatch()
+        if isinstance(json_data, dict):
+            self._standardize_entry(json_data, notes, rounding_batch)
+        else:
+            for entry in json_data:
+                self._standardize_entry(entry, notes, rounding_batch)
+        rounding_batch.flush(notes)
+        return json_data, notes
 
-        # Navigate through the nested dictionary to the target field
-        target_field = path_parts[-1]
 
-        current = json_data
+_default_engine = None
+_default_engine_lock = threading.Lock()
 
-        for _ in range(len(path_parts) - 1):
-            part = path_parts.pop(0)
-            current = current.get(part, {})
-            # If entry is a list then create a loop and recursively check each entry
-            if type(current) == list:
-                # If there is a still a dict to traverse then do so
-                current_first = current[0] if current else None
-                if type(current_first) == dict:
-                    for current_entry in current:
-                        loop_path_parts = ".".join(path_parts)
-                        self._traverse_json(current_entry, loop_path_parts, rule)
-                    return json_data
-
-        # run rule if field exists and is not None
-        if target_field in current and current[target_field] is not None:
-            # If target_field is a list then apply the rule to each entry
-            if type(current[target_field]) == list:
-                new_list = []
-                for target_field_entry in current[target_field]:
-                    new_val = self._run_rule(
-                        current, target_field_entry, field_path, rule
-                    )
-                    if new_val:
-                        new_list.append(new_val)
-                    else:
-                        new_list.append(target_field_entry)
-                current[target_field] = new_list
-
-            # Else run on the target_field value directly
-            else:
-                new_val = self._run_rule(
-                    current, current[target_field], field_path, rule
-                )
-                if new_val:
-                    current[target_field] = new_val
-
-        return
-
-    def _run_standardizer(self, json_data_list):
-        """Standardize each dictionary in a list of dictionaries."""
-        for json_data in json_data_list:
-            for key, value in json_data.items():
-                # Trim whitespace from all str entries
-                if isinstance(value, str):
-                    strip_value = value.strip()
-                    if strip_value == "":
-                        json_data[key] = None
-                    else:
-                        json_data[key] = strip_value
-
-            # Apply "rules" to appropriate fields in json
-            for field_path, rule in self.rules.items():
-                self._traverse_json(json_data, field_path, rule)
-        
-        return json_data_list, self.notes
+
+def get_default_engine():
+    """Returns the process-wide StandardizerEngine built from STANDARDIZATION_RULES."""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = StandardizerEngine()
+    return _default_engine
+
+
+class JSONStandardizer:
+    """
+    Thin wrapper around StandardizerEngine that keeps the original one-object-per-run
+    interface. The compiled rules and lookup tables come from the shared default engine
+    unless an engine is provided.
+
+    Notes are returned as the original list of messages. Use the engine directly to get
+    the structured NoteLog.
+
+    Example usage
+        standardizer = JSONStandardizer(json_data_list)
+        standardized_json, notes = standardizer.standardize()
+    """
+
+    def __init__(self, json_dict, engine=None):
+        self.json_data = json_dict
+        self.engine = get_default_engine() if engine is None else engine
+        self.rules = self.engine.rules
+        self.notes = []
 
     def standardize(self):
         """
         Used to run the standardization of an NP-MRD Exchange JSON.
 
         Returns:
-            list:
+            tuple: (standardized_json, notes)
 
         Example Output:
 
         """
         try:
-            standardized_json = self._run_standardizer(self.json_data)
-            return standardized_json
+            standardized_json, note_log = self.engine.standardize(self.json_data)
+            self.notes = note_log.format()
+            return standardized_json, self.notes
 
         except Exception:
             print(f"An error occurred: {traceback.format_exc()}")
@@ -309,11 +314,10 @@ if __name__ == "__main__":
         json_file_path = sys.argv[1]
 
         try:
-            with open(json_file_path, "r") as file:
-                json_dict = json.load(file)
+            json_dict = json_io.load_file(json_file_path)
         except FileNotFoundError:
             print(f"JSON not found: {json_dict}")
-        except json.JSONDecodeError:
+        except json_io.JSONDecodeError:
             print(f"Provided JSON is invalid: {json_dict}")
 
         standardizer = JSONStandardizer(json_dict)
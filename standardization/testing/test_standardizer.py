@@ -2,10 +2,16 @@ import unittest
 import os
 import sys
 import json
+import shutil
+import subprocess
+import tempfile
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from standardization.standardizer import JSONStandardizer
+from standardization.standardizer import JSONStandardizer, StandardizerEngine
+from standardization.dates import standardize_date_string, standardize_date_time_string
+from standardization.rules import RuleRegistry, default_rules
+from standardization.lookup_tables import LookupTableRegistry, get_lookup_table, standardization_files_dir
 
 class TestStandardizer(unittest.TestCase):
 
@@ -18,6 +24,18 @@ class TestStandardizer(unittest.TestCase):
         
     def test_deposition_json_1(self):
         self.run_test_for_json_file(self.article_json_1)
+
+    def test_run_as_script(self):
+        # Run by file path from another directory, as external callers do
+        script_path = os.path.join(os.path.dirname(__file__), '..', 'standardizer.py')
+        completed = subprocess.run(
+            [sys.executable, script_path, os.path.join(self.test_json_folder, self.article_json_1)],
+            cwd=tempfile.gettempdir(),
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertIn("All entries have been standardized.", completed.stdout)
         
     # def test_presubmission_json_1(self):
     #     self.run_test_for_json_file(self.presubmission_json_1)
@@ -28,6 +46,77 @@ class TestStandardizer(unittest.TestCase):
     # def test_peak_list_only_json_1(self):
     #     self.run_test_for_json_file(self.peak_list_only_json_1)
 
+    def test_engine_notes_are_per_call(self):
+        engine = StandardizerEngine()
+        first_entry, first_notes = engine.standardize({"submission": {"source": "DFT_TEAM"}})
+        second_entry, second_notes = engine.standardize({"submission": {"source": "dft_team"}})
+
+        self.assertEqual(first_entry["submission"]["source"], "dft_team")
+        self.assertEqual(len(first_notes), 1)
+        self.assertEqual(second_notes.format(), [])
+
+    def test_notes_are_formatted_on_demand(self):
+        entry = {"submission": {"source": "DFT_TEAM"}, "depositor_info": {"account_id": "12"}}
+        standardized_entry, notes = StandardizerEngine().standardize(entry)
+
+        self.assertEqual(notes.to_list(), [
+            {"field_path": "submission.source", "rule": "lowercase", "old_value": "DFT_TEAM", "new_value": "dft_team"},
+            {"field_path": "depositor_info.account_id", "rule": "make_int", "old_value": "12", "new_value": 12},
+        ])
+        self.assertEqual(notes.format()[0], "'submission.source': made lowercase 'DFT_TEAM' -> 'dft_team'")
+
+    def test_aggregate_notes_keep_counts_and_samples(self):
+        engine = StandardizerEngine(notes_mode="aggregate")
+        entries = [{"submission": {"source": f"SOURCE_{i}"}} for i in range(50)]
+        standardized_entries, notes = engine.standardize(entries)
+
+        self.assertEqual(notes.counts(), {("submission.source", "lowercase"): 50})
+        self.assertEqual(len(notes.notes()), notes.sample_size)
+        self.assertEqual(notes.format()[0], "'submission.source': lowercase applied to 50 value(s)")
+
+    def test_date_standardization(self):
+        # ISO-8601 fast path
+        self.assertEqual(standardize_date_time_string("2023-08-17T23:34:03.083182+00:00"), "2023-08-17T23:34:03.083182+00:00")
+        self.assertEqual(standardize_date_time_string("2023-08-17 23:34:03Z"), "2023-08-17T23:34:03.000000+00:00")
+        self.assertEqual(standardize_date_string("2023-08-17T23:34:03.5"), "2023-08-17T00:00:00.000000+00:00")
+        # dateutil fallback
+        self.assertEqual(standardize_date_time_string("Aug 17 2023 11:34pm"), "2023-08-17T23:34:00.000000+00:00")
+        with self.assertRaises(ValueError):
+            standardize_date_string("not a date")
+
+    def test_peak_list_values_rounded_with_single_note(self):
+        values = [1.23456789 * i for i in range(100)] + [0.00001]
+        entry = {"nmr_data": {"peak_lists": [{"values": list(values)}, {"values": [2.5, 7]}]}}
+        standardized_entry, notes = StandardizerEngine().standardize(entry)
+
+        expected = [float(round(val, 4)) or val for val in values]
+        self.assertEqual(standardized_entry["nmr_data"]["peak_lists"][0]["values"], expected)
+        self.assertEqual(standardized_entry["nmr_data"]["peak_lists"][1]["values"], [2.5, 7.0])
+        self.assertEqual(notes.format(), ["'nmr_data.peak_lists.values': adjusted 99 value(s) to go to 4 decimal places"])
+
+    def test_custom_rule_registry(self):
+        registry = RuleRegistry(default_rules)
+
+        @registry.register("kelvin_to_celsius", param="decimals")
+        def kelvin_to_celsius(val, notes, field_path, rule, lookup_tables, decimals):
+            return round(float(val) - 273.15, decimals)
+
+        engine = StandardizerEngine(
+            rules={"nmr_data.peak_lists.temperature": "kelvin_to_celsius-1", "submission.source": "lowercase"},
+            rule_registry=registry,
+        )
+        standardized_entry, notes = engine.standardize(
+            {"submission": {"source": "DFT_TEAM"}, "nmr_data": {"peak_lists": [{"temperature": 298.15}]}}
+        )
+        self.assertEqual(standardized_entry["nmr_data"]["peak_lists"][0]["temperature"], 25.0)
+        self.assertEqual(standardized_entry["submission"]["source"], "dft_team")
+        self.assertNotIn("kelvin_to_celsius", default_rules)
+
+        with self.assertRaises(ValueError):
+            StandardizerEngine(rules={"submission.source": "not_a_rule"})
+        with self.assertRaises(ValueError):
+            StandardizerEngine(rules={"nmr_data.peak_lists.values": "decimal_places-x"})
+
     def run_test_for_json_file(self, json_file):
         json_file_path = os.path.join(self.test_json_folder, json_file)
         with open(json_file_path, 'r') as file:
@@ -38,5 +127,29 @@ class TestStandardizer(unittest.TestCase):
 
         self.assertTrue(standardition_results[0]['inchikey'] != None, f"Validation failed")
 
+class TestLookupTables(unittest.TestCase):
+
+    def setUp(self):
+        self.files_dir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(standardization_files_dir, "vendor_standardizer.json"), self.files_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.files_dir)
+
+    def test_tables_shared_between_callers(self):
+        solvent_table = get_lookup_table("solvent")
+        self.assertIs(solvent_table, get_lookup_table("solvent"))
+        with self.assertRaises(TypeError):
+            solvent_table["DMSO"] = "changed"
+
+    def test_reload_on_change(self):
+        registry = LookupTableRegistry(reload_on_change=True, check_interval=0, files_dir=self.files_dir)
+        self.assertEqual(registry.get("vendor")["BRUKER"], "Bruker")
+
+        table_path = os.path.join(self.files_dir, "vendor_standardizer.json")
+        with open(table_path, 'w') as file:
+            json.dump({"BRUKER": "Bruker Corp"}, file)
+        self.assertEqual(registry.get("vendor")["BRUKER"], "Bruker Corp")
+
 if __name__ == "__main__":
     unittest.main()
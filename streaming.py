@@ -0,0 +1,229 @@
+import io
+import sys
+import json
+
+from . import json_io
+from .script_consolidator import ScriptConsolidator
+
+# Characters read from the input file at a time by iter_json_array
+READ_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_TERMINATORS = _WHITESPACE + ",]"
+# A decoding error this close to the end of the buffer (i.e. "tru" of "true", "-Infin"
+# of "-Infinity" or a cut "\u" escape) may only mean the element continues in the next read
+_TRUNCATION_MARGIN = len("-Infinity")
+
+
+def iter_json_array(file_obj, read_size=READ_SIZE):
+    """
+    Incrementally parse a file holding a top-level JSON array, yielding one element at a
+    time. Only the element being decoded (plus one read buffer) is held in memory, so
+    files far larger than memory can be processed.
+
+    Args:
+        file_obj: text file object positioned at the start of the JSON array.
+        read_size (int): number of characters read at a time.
+
+    Yields:
+        the decoded elements of the array, in order.
+
+    Raises:
+        json.JSONDecodeError: if the file is not a valid JSON array.
+    """
+    # The standard library decoder is used here as it can decode from an offset of a
+    # partially read buffer (raw_decode), which json_io's backends can not
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill(min_size):
+        # Drop what has been consumed and read at least min_size more characters
+        nonlocal buffer, position, eof
+        buffer = buffer[position:]
+        position = 0
+        while not eof and len(buffer) < min_size:
+            chunk = file_obj.read(max(read_size, min_size - len(buffer)))
+            if not chunk:
+                eof = True
+            buffer += chunk
+
+    def next_char():
+        # Skip whitespace and return the next character (None at end of file)
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if eof:
+                return None
+            fill(read_size)
+
+    def syntax_error(message):
+        return json.JSONDecodeError(message, buffer, position)
+
+    if next_char() != "[":
+        raise syntax_error("Expecting '[' at the start of the JSON array")
+    position += 1
+
+    if next_char() == "]":
+        position += 1
+        if next_char() is not None:
+            raise syntax_error("Extra data after the JSON array")
+        return
+    while True:
+        # Decode the next element, reading more of the file until it is complete. The
+        # amount read doubles each time so a large element is not re-scanned over and
+        # over.
+        wanted = read_size
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # Anything but an element cut short by the end of the buffer is a syntax
+                # error, raised without reading the rest of the file
+                if eof or not (
+                    e.pos >= len(buffer) - _TRUNCATION_MARGIN
+                    or e.msg.startswith("Unterminated string")
+                ):
+                    raise
+            else:
+                # A number may continue in the next read ("1" of "1.5"), so it is only
+                # complete once followed by whitespace, "," or "]"
+                if (
+                    eof
+                    or type(element) not in (int, float)
+                    or (end < len(buffer) and buffer[end] in _NUMBER_TERMINATORS)
+                ):
+                    break
+            wanted = 2 * max(wanted, len(buffer) - position)
+            fill(wanted)
+        position = end
+        yield element
+
+        separator = next_char()
+        if separator == "]":
+            position += 1
+            if next_char() is not None:
+                raise syntax_error("Extra data after the JSON array")
+            return
+        if separator != ",":
+            raise syntax_error("Expecting ',' or ']' after an array element")
+        position += 1
+        next_char()
+
+
+class JSONArrayWriter:
+    """
+    Writes a JSON array one element at a time (one element per line), so the whole
+    array never has to be held in memory. The file can be opened in text or binary
+    mode, binary skipping the conversion of every element to str.
+
+    Example usage
+        with open("standardized.json", "wb") as output_file:
+            writer = JSONArrayWriter(output_file)
+            for entry in entries:
+                writer.write(entry)
+            writer.close()
+    """
+
+    def __init__(self, file_obj):
+        self.file_obj = file_obj
+        self.count = 0
+        self.binary = not isinstance(file_obj, io.TextIOBase)
+        self._write("[")
+
+    def write(self, element):
+        self._write("\n" if self.count == 0 else ",\n")
+        if self.binary:
+            self.file_obj.write(json_io.dumps_bytes(element))
+        else:
+            self.file_obj.write(json_io.dumps(element))
+        self.count += 1
+
+    def close(self):
+        self._write("\n]\n" if self.count else "]\n")
+
+    def _write(self, text):
+        self.file_obj.write(text.encode("utf-8") if self.binary else text)
+
+
+def stream_pipeline(
+    input_file_path,
+    output_file_path=None,
+    results_file_path=None,
+    run_schema=True,
+    run_standardizer=True,
+    run_validator=True,
+    timeout=None,
+    consolidator_kwargs=None,
+):
+    """
+    Runs the ScriptConsolidator steps over an NP-MRD Exchange JSON of any size, one
+    entry at a time. Entries are parsed incrementally from input_file_path, the
+    standardized entries are written to output_file_path as they are produced and the
+    result of each entry is written as one JSON line to results_file_path. Peak memory
+    is bounded by the largest single entry rather than the file size.
+
+    Args:
+        input_file_path (str): NP-MRD Exchange JSON (a JSON array of entries).
+        output_file_path (str): where to write the standardized entries (skipped if None).
+        results_file_path (str): where to write the JSON-lines results (skipped if None).
+        run_schema, run_standardizer, run_validator, timeout: see
+            ScriptConsolidator.run_scripts.
+        consolidator_kwargs (dict): extra arguments for ScriptConsolidator (i.e. engines).
+
+    Returns:
+        dict: counts with the fields...
+            entries (int): number of entries processed
+            schema_invalid (int): entries that failed schema validation
+            validator_invalid (int): entries that failed the custom validation
+            errors (int): entries abandoned because of an error (i.e. a timeout)
+    """
+    summary = {"entries": 0, "schema_invalid": 0, "validator_invalid": 0, "errors": 0}
+
+    with open(input_file_path, "r", encoding="utf-8") as input_file:
+        output_file = open(output_file_path, "wb") if output_file_path else None
+        results_file = open(results_file_path, "wb") if results_file_path else None
+        try:
+            writer = JSONArrayWriter(output_file) if output_file else None
+            consolidator = ScriptConsolidator(
+                iter_json_array(input_file), **(consolidator_kwargs or {})
+            )
+            processed = consolidator.iter_scripts(
+                run_schema, run_standardizer, run_validator, timeout
+            )
+            for index, (json_data, result) in enumerate(processed):
+                summary["entries"] += 1
+                if "error" in result:
+                    summary["errors"] += 1
+                if run_schema and not result.get("schema", {}).get("valid", True):
+                    summary["schema_invalid"] += 1
+                if run_validator and not result.get("validator", {}).get("valid", True):
+                    summary["validator_invalid"] += 1
+
+                if writer:
+                    writer.write(json_data)
+                if results_file:
+                    results_file.write(json_io.dumps_bytes({"index": index, **result}) + b"\n")
+            if writer:
+                writer.close()
+        finally:
+            if output_file:
+                output_file.close()
+            if results_file:
+                results_file.close()
+
+    return summary
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print(
+            "Usage: python -m npmrd_data_exchange.streaming <json_file> <standardized_json_file> <results_jsonl_file>"
+        )
+    else:
+        summary = stream_pipeline(sys.argv[1], sys.argv[2], sys.argv[3])
+        print(json_io.dumps(summary))
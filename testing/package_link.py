@@ -0,0 +1,44 @@
+"""
+The modules at the repo root use relative imports, so the tests import them through a
+"npmrd_data_exchange" package: a symlink to the repo root in a temporary directory on
+sys.path. It is created once per process, however many test modules ask for it, and
+removed when the process exits.
+"""
+import atexit
+import os
+import sys
+import tempfile
+
+PACKAGE_NAME = "npmrd_data_exchange"
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+_package_dir = None
+
+
+def link_package():
+    """
+    Make the repo root importable as the npmrd_data_exchange package.
+
+    Returns:
+        str: the directory holding the package symlink.
+    """
+    global _package_dir
+    if _package_dir is None:
+        _package_dir = tempfile.TemporaryDirectory()
+        os.symlink(repo_root, os.path.join(_package_dir.name, PACKAGE_NAME))
+        sys.path.append(_package_dir.name)
+        atexit.register(unlink_package)
+    return _package_dir.name
+
+
+def unlink_package():
+    """Remove the package symlink and its directory from disk and sys.path."""
+    global _package_dir
+    if _package_dir is None:
+        return
+    if _package_dir.name in sys.path:
+        sys.path.remove(_package_dir.name)
+    os.unlink(os.path.join(_package_dir.name, PACKAGE_NAME))
+    _package_dir.cleanup()
+    _package_dir = None
@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import json
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from package_link import link_package
+
+# Cumulative import time allowed for each entry point (as reported by "python -X importtime")
+IMPORT_TIME_BUDGET_MS = 250
+
+# Modules that must only be imported once the feature needing them is used
+HEAVY_MODULES = ["jsonschema", "numpy", "pandas", "rdkit", "dateutil"]
+
+ENTRY_POINTS = [
+    "npmrd_data_exchange.script_consolidator",
+    "npmrd_data_exchange.server",
+    "npmrd_data_exchange.streaming",
+    "npmrd_data_exchange.standardization.standardizer",
+    "npmrd_data_exchange.validation.validator",
+    "npmrd_data_exchange.conversion.curator_conversion.npmrd_curator_converter",
+    "npmrd_data_exchange.alignment.align",
+]
+
+class TestImportTime(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The modules use relative imports, so they are imported through the
+        # npmrd_data_exchange package (see package_link.py), from its directory
+        cls.package_dir = link_package()
+
+    def test_import_time_budget(self):
+        for module in ENTRY_POINTS:
+            with self.subTest(module=module):
+                import_time_ms, loaded_heavy_modules = self.import_module(module)
+                self.assertEqual(loaded_heavy_modules, [], f"{module} imports heavy dependencies at import time")
+                self.assertLess(import_time_ms, IMPORT_TIME_BUDGET_MS, f"{module} took {import_time_ms:.1f} ms to import")
+
+    def import_module(self, module):
+        code = (
+            f"import sys, json, {module}; "
+            f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=self.package_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # Lines look like "import time: self [us] | cumulative | imported package"
+        cumulative_us = 0
+        for line in completed.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                cumulative_us = int(fields[1])
+        return cumulative_us / 1000, json.loads(completed.stdout)
+
+if __name__ == "__main__":
+    unittest.main()
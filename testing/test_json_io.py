@@ -0,0 +1,84 @@
+import unittest
+import os
+import sys
+import json
+import math
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json_io
+
+class TestJSONIO(unittest.TestCase):
+
+    def setUp(self):
+        self.data = {
+            "compound_name": "2′-O-methyl",
+            "values": [1, 2.5, -0.001, None, True],
+            "nested": {"b": 1, "a": [{"c": "d"}]},
+        }
+
+    def test_round_trip_with_each_backend(self):
+        for backend in [json_io.orjson, None]:
+            with self.subTest(backend=backend), mock.patch.object(json_io, "orjson", backend):
+                self.assertEqual(json_io.loads(json_io.dumps(self.data)), self.data)
+                self.assertEqual(json_io.loads(json_io.dumps_bytes(self.data)), self.data)
+                self.assertEqual(json_io.loads(json_io.dumps(self.data, pretty=True)), self.data)
+
+    def test_output_matches_between_backends(self):
+        if json_io.orjson is None:
+            self.skipTest("orjson is not installed")
+        outputs = []
+        for backend in [json_io.orjson, None]:
+            with mock.patch.object(json_io, "orjson", backend):
+                outputs.append((
+                    json_io.dumps_bytes(self.data),
+                    json_io.dumps_bytes(self.data, pretty=True, sort_keys=True),
+                ))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0][0], json.dumps(self.data, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+    def test_falls_back_for_data_orjson_rejects(self):
+        # Non-string keys and integers over 64 bits are only supported by json
+        data = {1: 2 ** 70}
+        self.assertEqual(json_io.dumps(data), '{"1":1180591620717411303424}')
+
+    def test_invalid_json_raises_json_decode_error(self):
+        for backend in [json_io.orjson, None]:
+            with self.subTest(backend=backend), mock.patch.object(json_io, "orjson", backend):
+                with self.assertRaises(json.JSONDecodeError):
+                    json_io.loads(b'{"a": ')
+
+    def test_non_finite_floats_decode_with_each_backend(self):
+        for backend in [json_io.orjson, None]:
+            with self.subTest(backend=backend), mock.patch.object(json_io, "orjson", backend):
+                values = json_io.loads(b'[NaN, Infinity, -Infinity, 1.5]')
+                self.assertTrue(math.isnan(values[0]))
+                self.assertEqual(values[1:], [math.inf, -math.inf, 1.5])
+
+    def test_float_formatting_between_backends(self):
+        if json_io.orjson is None:
+            self.skipTest("orjson is not installed")
+        values = [1e16, 1e-7, 1.5e300, -0.0, 0.1]
+        with mock.patch.object(json_io, "orjson", None):
+            stdlib_output = json_io.dumps(values)
+        orjson_output = json_io.dumps(values)
+        # The exponent is written differently, but the values decode the same
+        self.assertEqual(stdlib_output, "[1e+16,1e-07,1.5e+300,-0.0,0.1]")
+        self.assertEqual(orjson_output, "[1e16,1e-7,1.5e300,-0.0,0.1]")
+        self.assertEqual(json_io.loads(orjson_output), json_io.loads(stdlib_output))
+
+        # Non-finite floats are written as null by orjson
+        with mock.patch.object(json_io, "orjson", None):
+            self.assertEqual(json_io.dumps([math.nan, math.inf]), "[NaN,Infinity]")
+        self.assertEqual(json_io.dumps([math.nan, math.inf]), "[null,null]")
+
+    def test_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "data.json")
+            json_io.dump_file(self.data, file_path, pretty=True)
+            self.assertEqual(json_io.load_file(file_path), self.data)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import os
+import sys
+import copy
+import json
+import time
+import threading
+import warnings
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# script_consolidator uses relative imports, so it is imported through the npmrd_data_exchange
+# package (see package_link.py)
+from package_link import link_package, repo_root
+link_package()
+
+from npmrd_data_exchange import script_consolidator
+from npmrd_data_exchange.script_consolidator import (
+    ScriptConsolidator,
+    EntryTimeoutError,
+    entry_timeout,
+)
+from npmrd_data_exchange.standardization.notes import NoteLog
+
+
+class SlowStandardizerEngine:
+    """Standardizer engine taking "sleep" seconds per entry and swallowing exceptions."""
+
+    def standardize(self, json_data):
+        json_data["standardized"] = True
+        try:
+            time.sleep(json_data.get("sleep", 0))
+        except Exception:
+            pass
+        return json_data, NoteLog()
+
+
+class TestEntryTimeout(unittest.TestCase):
+
+    def test_timeout_is_not_swallowed_by_broad_handlers(self):
+        start = time.perf_counter()
+        with self.assertRaises(EntryTimeoutError):
+            with entry_timeout(0.05):
+                try:
+                    time.sleep(2)
+                except Exception:
+                    pass
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_warns_when_the_timeout_can_not_be_enforced(self):
+        caught = []
+        def run():
+            with warnings.catch_warnings(record=True) as caught_warnings:
+                warnings.simplefilter("always")
+                with entry_timeout(0.01):
+                    time.sleep(0.05)
+            caught.extend(caught_warnings)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual([warning.category for warning in caught], [RuntimeWarning])
+        self.assertIn("main thread", str(caught[0].message))
+
+    def test_no_timeout(self):
+        with entry_timeout(None):
+            time.sleep(0.01)
+        with entry_timeout(1):
+            time.sleep(0.01)
+
+
+class TestScriptConsolidator(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(repo_root, "validation", "testing", "test_jsons", "article_json_1.json"), 'r') as file:
+            self.entry = json.load(file)[0]
+
+    def test_process_entry(self):
+        consolidator = ScriptConsolidator([])
+        json_data, result = consolidator._process_entry(copy.deepcopy(self.entry), True, True, True, None)
+        self.assertEqual(result["inchikey"], self.entry["inchikey"])
+        self.assertIn("standardizer_notes", result)
+        self.assertIn("valid", result["schema"])
+        self.assertIn("valid", result["validator"])
+        self.assertNotIn("error", result)
+
+    def test_timed_out_entry_is_returned_untouched(self):
+        entry = dict(copy.deepcopy(self.entry), sleep=2)
+        entry_before = copy.deepcopy(entry)
+        consolidator = ScriptConsolidator([], standardizer_engine=SlowStandardizerEngine())
+
+        json_data, result = consolidator._process_entry(entry, True, True, True, 0.1)
+
+        self.assertIn("timed out", result["error"])
+        self.assertIs(json_data, entry)
+        self.assertEqual(json_data, entry_before)
+        # The remaining steps do not run once the entry timed out
+        self.assertNotIn("validator", result)
+
+    def test_run_scripts_timeout_serial_and_parallel(self):
+        entries = [
+            dict(copy.deepcopy(self.entry), sleep=2),
+            dict(copy.deepcopy(self.entry), sleep=0),
+        ]
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                consolidator = ScriptConsolidator(
+                    copy.deepcopy(entries), standardizer_engine=SlowStandardizerEngine()
+                )
+                updated_json_list, result_dict = consolidator.run_scripts(
+                    workers=workers, chunksize=1, timeout=0.2
+                )
+                self.assertIn("error", result_dict[0])
+                self.assertEqual(updated_json_list[0], entries[0])
+                self.assertNotIn("error", result_dict[1])
+                self.assertTrue(updated_json_list[1]["standardized"])
+                self.assertIn("validator", result_dict[1])
+
+    def test_json_schema_is_loaded_on_first_access(self):
+        self.assertTrue(os.path.isfile(script_consolidator.schema_file_path))
+        script_consolidator.__dict__.pop("json_schema", None)
+        json_schema = script_consolidator.json_schema
+        with open(script_consolidator.schema_file_path, 'r', encoding="utf-8") as file:
+            self.assertEqual(json_schema, json.load(file))
+        # Cached as a module attribute once loaded
+        self.assertIs(script_consolidator.__dict__["json_schema"], json_schema)
+        with self.assertRaises(AttributeError):
+            script_consolidator.not_an_attribute
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+import io
+import json
+import socket
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# server uses relative imports, so it is imported through the npmrd_data_exchange
+# package (see package_link.py)
+from package_link import link_package, repo_root
+link_package()
+
+from npmrd_data_exchange import server
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(repo_root, "validation", "testing", "test_jsons", "article_json_1.json"), 'r') as file:
+            self.entry = json.load(file)[0]
+        curator_json_path = os.path.join(
+            repo_root, "alignment", "npmrd_curator_23d8da7e-03e7-4dc6-91ae-4dbc91213de2.json"
+        )
+        with open(curator_json_path, 'r') as file:
+            self.curator_json = json.load(file)
+
+    def request(self, **request):
+        response = server.handle_request(json.dumps(request))
+        self.assertEqual(set(response["timings"]), {"parse_ms", "handle_ms", "total_ms"})
+        return response
+
+    def test_operations(self):
+        response = self.request(id=1, op="ping")
+        self.assertEqual(response["id"], 1)
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["result"]["pid"], os.getpid())
+
+        response = self.request(op="standardize", data=self.entry)
+        self.assertTrue(response["ok"])
+        self.assertIn("notes", response["result"])
+
+        response = self.request(op="validate", data=[self.entry, self.entry], standardize=True)
+        self.assertTrue(response["ok"])
+        self.assertEqual(len(response["result"]["results"]), 2)
+        self.assertEqual(len(response["result"]["data"]), 2)
+        self.assertTrue(response["result"]["results"][0]["validator"]["valid"])
+
+        response = self.request(op="convert", data=self.curator_json[:1])
+        self.assertTrue(response["ok"])
+        self.assertEqual(len(response["result"]["data"]), 1)
+
+        mol_block = self.curator_json[0]["canonicalized_mol_block"]
+        response = self.request(
+            op="align",
+            curation_mol_block=mol_block,
+            db_mol_block=mol_block,
+            c_values=[{"rdkit_index": 1, "shift": 23.5}],
+        )
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["result"]["c_values"], [{"rdkit_index": 1, "shift": 23.5}])
+
+    def test_error_responses(self):
+        response = self.request(id=2, op="validate")
+        self.assertFalse(response["ok"])
+        self.assertEqual(response["id"], 2)
+        self.assertEqual(response["error"]["type"], "RequestError")
+        self.assertIn("'data'", response["error"]["message"])
+
+        response = self.request(op="unknown")
+        self.assertEqual(response["error"]["type"], "RequestError")
+        self.assertIn("Unknown op", response["error"]["message"])
+
+        response = server.handle_request("not json")
+        self.assertEqual(response["error"]["type"], "RequestError")
+        response = server.handle_request("[1, 2]")
+        self.assertEqual(response["error"]["type"], "RequestError")
+
+        # Errors raised by an operation are reported back with their type
+        with io.StringIO() as stderr, mock.patch.object(sys, "stderr", stderr):
+            response = self.request(op="convert", data=[{"name": "missing fields"}])
+        self.assertFalse(response["ok"])
+        self.assertEqual(response["error"]["type"], "KeyError")
+
+    def test_serve_stdio_keeps_prints_off_the_responses(self):
+        mol_block = self.curator_json[0]["canonicalized_mol_block"]
+        requests = [
+            {"id": 1, "op": "align", "curation_mol_block": mol_block, "db_mol_block": mol_block},
+            {"id": 2, "op": "ping"},
+        ]
+        input_stream = io.BytesIO(b"".join(json.dumps(request).encode() + b"\n\n" for request in requests))
+        output_stream = io.BytesIO()
+        stdout_before = sys.stdout
+        with io.StringIO() as stderr, mock.patch.object(sys, "stderr", stderr):
+            server.serve_stdio(input_stream, output_stream)
+            self.assertIn("Alignment complete", stderr.getvalue())
+
+        self.assertIs(sys.stdout, stdout_before)
+        responses = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+        self.assertEqual([response["id"] for response in responses], [1, 2])
+        self.assertTrue(all(response["ok"] for response in responses))
+
+    def test_only_stale_sockets_are_removed(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "results.json")
+            with open(file_path, 'w') as file:
+                file.write("[]")
+            with self.assertRaises(FileExistsError):
+                server.serve_unix_socket(file_path)
+            self.assertTrue(os.path.isfile(file_path))
+
+            socket_path = os.path.join(temp_dir, "server.sock")
+            with socket.socket(socket.AF_UNIX) as stale_socket:
+                stale_socket.bind(socket_path)
+            server._remove_stale_socket(socket_path)
+            self.assertFalse(os.path.exists(socket_path))
+            # Nothing to remove
+            server._remove_stale_socket(socket_path)
+
+if __name__ == "__main__":
+    unittest.main()
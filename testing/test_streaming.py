@@ -0,0 +1,115 @@
+import unittest
+import os
+import sys
+import io
+import json
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# streaming uses relative imports, so it is imported through the npmrd_data_exchange
+# package (see package_link.py)
+from package_link import link_package, repo_root
+link_package()
+
+from npmrd_data_exchange.streaming import iter_json_array, JSONArrayWriter, stream_pipeline
+
+# Small read sizes so values, whitespace and separators land on chunk boundaries
+READ_SIZES = [1, 2, 3, 5, 8, 64, 1 << 16]
+
+
+class TestIterJSONArray(unittest.TestCase):
+
+    def parse(self, text, read_size):
+        return list(iter_json_array(io.StringIO(text), read_size=read_size))
+
+    def assertParsesLikeJSON(self, text):
+        for read_size in READ_SIZES:
+            with self.subTest(text=text[:40], read_size=read_size):
+                self.assertEqual(self.parse(text, read_size), json.loads(text))
+
+    def test_values_split_across_chunks(self):
+        self.assertParsesLikeJSON('[-25000000000.0, 1.5e-7, 123456789, "long string value", true, false, null]')
+        self.assertParsesLikeJSON('[{"a": {"b": [1, 2, {"c": "d"}]}, "e": 1e5}, [[[]]], {}]')
+        self.assertParsesLikeJSON('[1]')
+        self.assertParsesLikeJSON('[10,200,3000]')
+
+    def test_whitespace_and_commas_at_chunk_edges(self):
+        self.assertParsesLikeJSON('  \n[ \n 1 ,\t 2\r\n ,\n\n "x"  ,  {}  ]  \n')
+        self.assertParsesLikeJSON('[1,2,3,4,5,6,7,8,9,10]')
+
+    def test_empty_arrays(self):
+        self.assertParsesLikeJSON('[]')
+        self.assertParsesLikeJSON(' [ \n ] \n')
+        self.assertParsesLikeJSON('[[], {}, []]')
+
+    def test_strings_containing_separators(self):
+        self.assertParsesLikeJSON('["]", ",", "a,b]c", "\\"],[\\"", {"k]": "v,"}, "2′-O-methyl"]')
+
+    def test_literals_and_escapes_split_across_chunks(self):
+        self.assertParsesLikeJSON('[true, false, null, NaN, Infinity, -Infinity, "\\u00e9\\n\\"", "2\\u2032-O"]')
+        self.assertParsesLikeJSON('["' + "x" * 1000 + '", {"' + "k" * 100 + '": [' + "1, " * 100 + '2]}]')
+
+    def test_malformed_input_is_not_read_to_the_end(self):
+        class CountingStringIO(io.StringIO):
+            characters_read = 0
+            def read(self, size=-1):
+                chunk = super().read(size)
+                self.characters_read += len(chunk)
+                return chunk
+
+        for read_size in [1, 8, 1024]:
+            with self.subTest(read_size=read_size):
+                file_obj = CountingStringIO('[{"a": 1], ["' + "x" * 1000000 + '"]]')
+                with self.assertRaises(json.JSONDecodeError) as context:
+                    list(iter_json_array(file_obj, read_size=read_size))
+                self.assertEqual(context.exception.msg, "Expecting ',' delimiter")
+                self.assertLess(file_obj.characters_read, 4 * read_size + 64)
+
+    def test_malformed_input(self):
+        for text in ['[1, 2', '[1 2]', '[1,]', '[', '', '[1]x', '[1] [2]', '["unterminated]', '[{"a": 1]']:
+            for read_size in READ_SIZES:
+                with self.subTest(text=text, read_size=read_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        self.parse(text, read_size)
+
+    def test_top_level_must_be_an_array(self):
+        for text in ['{"a": 1}', '1', '"[1]"', 'null']:
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError):
+                    self.parse(text, 4)
+
+
+class TestStreamPipeline(unittest.TestCase):
+
+    def test_writer_round_trip(self):
+        for file_obj in [io.StringIO(), io.BytesIO()]:
+            writer = JSONArrayWriter(file_obj)
+            for element in [{"a": "2′"}, [1, 2], None]:
+                writer.write(element)
+            writer.close()
+            self.assertEqual(json.loads(file_obj.getvalue()), [{"a": "2′"}, [1, 2], None])
+
+            empty_file_obj = type(file_obj)()
+            JSONArrayWriter(empty_file_obj).close()
+            self.assertEqual(json.loads(empty_file_obj.getvalue()), [])
+
+    def test_stream_pipeline(self):
+        input_file_path = os.path.join(repo_root, "validation", "testing", "test_jsons", "article_json_1.json")
+        with open(input_file_path, 'r', encoding="utf-8") as file:
+            entries = json.load(file)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file_path = os.path.join(temp_dir, "standardized.json")
+            results_file_path = os.path.join(temp_dir, "results.jsonl")
+            summary = stream_pipeline(input_file_path, output_file_path, results_file_path)
+
+            self.assertEqual(summary["entries"], len(entries))
+            self.assertEqual(summary["errors"], 0)
+            with open(output_file_path, 'r', encoding="utf-8") as file:
+                self.assertEqual(len(json.load(file)), len(entries))
+            with open(results_file_path, 'r', encoding="utf-8") as file:
+                results = [json.loads(line) for line in file]
+            self.assertEqual([result["index"] for result in results], list(range(len(entries))))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+import os
+import threading
+from functools import lru_cache
+from itertools import product
+
+try:
+    from .. import json_io
+except ImportError:
+    # Imported with the repo root on sys.path
+    import json_io
+
+current_dir = os.path.dirname(__file__)
+one_level_up = os.path.dirname(current_dir)
+rulebook_file_path = os.path.join(
+    one_level_up, "standardization_files", "validation_rulebook.json"
+)
+
+_NODE_KEYS = {"required", "switch", "required_if_true"}
+
+
+def resolve_field_path(json_data, path_parts):
+    """
+    Follows path_parts (a tuple of keys) into json_data. Returns None if any key along the
+    way is missing or null.
+    """
+    current_data = json_data
+    for part in path_parts:
+        if not isinstance(current_data, dict):
+            return None
+        current_data = current_data.get(part)
+        if current_data is None:
+            return None
+    return current_data
+
+
+class FieldCheck:
+    """
+    A required field name ("nest.nested_value", or alternatives separated by "|" of
+    which only one has to be non-null) split ahead of time into the tuples of keys to
+    follow.
+    """
+
+    __slots__ = ("field_name", "alternatives", "error_message")
+
+    def __init__(self, field_name):
+        self.field_name = field_name
+        self.alternatives = tuple(
+            tuple(one_of.split(".")) for one_of in field_name.split("|")
+        )
+        self.error_message = field_name + " is not in json or is null"
+
+    def is_satisfied(self, json_data):
+        """True if at least one of the alternatives is present and non-null."""
+        for path_parts in self.alternatives:
+            if resolve_field_path(json_data, path_parts) is not None:
+                return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def compile_field_checks(field_names):
+    """Returns a tuple of FieldCheck for a tuple of field names (compiled once per tuple)."""
+    return tuple(FieldCheck(field_name) for field_name in field_names)
+
+
+class ValidationPlan:
+    """
+    Every check required for one row of a source's decision table.
+
+    field_checks holds the FieldCheck always run (in the order errors are reported) and
+    conditional_field_checks holds (flag path, FieldCheck tuple) pairs only run when the
+    flag is True.
+    """
+
+    __slots__ = ("field_checks", "conditional_field_checks")
+
+    def __init__(self, field_checks, conditional_field_checks):
+        self.field_checks = field_checks
+        self.conditional_field_checks = conditional_field_checks
+
+
+class _Switch:
+    """A compiled "switch" of the rulebook: the field to read and its cases."""
+
+    __slots__ = ("path_parts", "cases")
+
+    def __init__(self, path_parts, cases):
+        self.path_parts = path_parts
+        # case value -> list of _Switch nested under that case
+        self.cases = cases
+
+    def decision_key(self, json_data, key):
+        """Append the matched case value (or None) and those of nested switches to key."""
+        value = resolve_field_path(json_data, self.path_parts)
+        if type(value) is str and value in self.cases:
+            key.append(value)
+            for switch in self.cases[value]:
+                switch.decision_key(json_data, key)
+        else:
+            key.append(None)
+
+
+class SourceRules:
+    """
+    The rules of a single submission.source compiled into a decision table. Each row key
+    is the tuple of case values matched by the switches (None where no case matches) and
+    maps to the ValidationPlan to run, so validating an entry costs one table lookup
+    plus the field checks.
+    """
+
+    def __init__(self, source, rules):
+        self.source = source
+        self._check_node(rules, source)
+        self.switches = [self._compile_switch(switch) for switch in rules.get("switch", [])]
+        conditional_field_checks = tuple(
+            (tuple(condition["field"].split(".")), compile_field_checks(tuple(condition["required"])))
+            for condition in rules.get("required_if_true", [])
+        )
+        self.decision_table = {
+            key: ValidationPlan(compile_field_checks(tuple(field_names)), conditional_field_checks)
+            for key, field_names in self._expand(rules)
+        }
+
+    def _check_node(self, node, location):
+        if not isinstance(node, dict) or not set(node) <= _NODE_KEYS:
+            raise ValueError(
+                f"Invalid rulebook entry for '{location}', expected a dictionary with keys from {sorted(_NODE_KEYS)}"
+            )
+
+    def _compile_switch(self, switch):
+        cases = {}
+        for value, case in switch["cases"].items():
+            self._check_node(case, f"{switch['field']}={value}")
+            cases[value] = [self._compile_switch(nested) for nested in case.get("switch", [])]
+        return _Switch(tuple(switch["field"].split(".")), cases)
+
+    def _expand(self, node):
+        """
+        Yields every (key, required field names) row reachable from node, matching the
+        order decision_key builds keys in.
+        """
+        switch_rows = []
+        for switch in node.get("switch", []):
+            rows = [((None,), [])]
+            for value, case in switch["cases"].items():
+                for nested_key, nested_fields in self._expand(case):
+                    rows.append(((value,) + nested_key, nested_fields))
+            switch_rows.append(rows)
+
+        for combination in product(*switch_rows):
+            key = ()
+            field_names = list(node.get("required", []))
+            for row_key, row_fields in combination:
+                key += row_key
+                field_names += row_fields
+            yield key, field_names
+
+    def get_plan(self, json_data):
+        """Returns the ValidationPlan for json_data."""
+        key = []
+        for switch in self.switches:
+            switch.decision_key(json_data, key)
+        return self.decision_table[tuple(key)]
+
+
+class ValidationRulebook:
+    """
+    Conditional field requirements per submission.source, loaded from
+    "standardization_files/validation_rulebook.json" and compiled into one decision
+    table per source when loaded.
+
+    Each source holds a node with any of...
+        required: field names that must be present and non-null
+        switch: list of {"field": ..., "cases": {value: node}}, where the node of the
+            case matching the field's value adds its own requirements (and switches)
+        required_if_true: list of {"field": ..., "required": [...]} only checked when
+            the field is True
+
+    Example usage
+        rulebook = ValidationRulebook.from_file()
+        plan = rulebook.sources["deposition_system"].get_plan(entry)
+    """
+
+    def __init__(self, rulebook):
+        self.sources = {
+            source: SourceRules(source, rules)
+            for source, rules in rulebook["sources"].items()
+        }
+
+    @classmethod
+    def from_file(cls, file_path=rulebook_file_path):
+        return cls(json_io.load_file(file_path))
+
+
+_default_rulebook = None
+_default_rulebook_lock = threading.Lock()
+
+
+def get_default_rulebook():
+    """Returns the process-wide ValidationRulebook compiled from rulebook_file_path."""
+    global _default_rulebook
+    if _default_rulebook is None:
+        with _default_rulebook_lock:
+            if _default_rulebook is None:
+                _default_rulebook = ValidationRulebook.from_file()
+    return _default_rulebook
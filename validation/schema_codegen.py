@@ -0,0 +1,392 @@
+import os
+import sys
+import types
+import threading
+import importlib.util
+
+from .schema_validator import load_schema, schema_file_path, schema_fingerprint
+
+current_dir = os.path.dirname(__file__)
+compiled_module_path = os.path.join(current_dir, "compiled_schema_validator.py")
+
+# Keywords that never produce errors with the default (format-checker free)
+# jsonschema validators and can be skipped by the generator.
+IGNORED_KEYWORDS = {
+    "$schema",
+    "id",
+    "version",
+    "title",
+    "description",
+    "default",
+    "examples",
+    "format",
+    "$comment",
+}
+
+TYPE_CHECKS = {
+    "string": "isinstance({v}, str)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "array": "isinstance({v}, list)",
+    "object": "isinstance({v}, dict)",
+}
+
+MODULE_HEADER = '''# This file is generated by validation/schema_codegen.py. Do not edit it by hand,
+# it is rewritten whenever the schema fingerprint no longer matches.
+from collections import deque
+
+SCHEMA_FINGERPRINT = {fingerprint!r}
+
+
+class SchemaValidationError(Exception):
+    """Mirrors the attributes of jsonschema.exceptions.ValidationError used by callers."""
+
+    def __init__(self, message, validator, path, instance):
+        super().__init__(message)
+        self.message = message
+        self.validator = validator
+        self.path = deque(path)
+        self.absolute_path = self.path
+        self.instance = instance
+
+    def __str__(self):
+        return self.message
+
+
+def _error(errors, validator, message, path, instance):
+    errors.append(SchemaValidationError(message, validator, path, instance))
+'''
+
+MODULE_FOOTER = '''
+
+def iter_errors(instance):
+    errors = []
+    {root}(instance, (), errors)
+    return iter(errors)
+
+
+def is_valid(instance):
+    errors = []
+    {root}(instance, (), errors)
+    return not errors
+'''
+
+
+class UnsupportedSchemaError(Exception):
+    """Raised when the schema uses a keyword the generator can not compile."""
+
+
+class _SchemaCompiler:
+    """
+    Emits one Python function per schema node that has to be validated independently
+    (the root, array "items" and "oneOf" branches). Nested object properties are inlined
+    into their parent function so that only array items cost a function call.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.functions = []
+        self.function_count = 0
+        self.variable_count = 0
+
+    def compile(self):
+        root = self._compile_function(self.schema)
+        return root, "\n\n\n".join(self.functions)
+
+    def _new_variable(self):
+        self.variable_count += 1
+        return f"v{self.variable_count}"
+
+    def _compile_function(self, schema):
+        self.function_count += 1
+        name = f"_validate_{self.function_count}"
+        lines = [f"def {name}(instance, path, errors):"]
+        body = self._compile_node(schema, "instance", (), 1)
+        lines.extend(body or ["    pass"])
+        self.functions.append("\n".join(lines))
+        return name
+
+    def _compile_node(self, schema, var, rel_path, depth):
+        if not isinstance(schema, dict):
+            raise UnsupportedSchemaError(f"Schema node is not an object: {schema!r}")
+        if "$ref" in schema:
+            raise UnsupportedSchemaError("'$ref' is not supported")
+
+        indent = "    " * depth
+        path_expr = f"path + {rel_path!r}" if rel_path else "path"
+        lines = []
+
+        def message(suffix):
+            # Matches the "<instance repr><suffix>" messages produced by jsonschema
+            return f"repr({var}) + {suffix!r}"
+
+        def error(validator, message_expr):
+            return (
+                f"{indent}    _error(errors, {validator!r}, {message_expr}, "
+                f"{path_expr}, {var})"
+            )
+
+        for keyword, value in schema.items():
+            if keyword in IGNORED_KEYWORDS:
+                continue
+
+            if keyword == "type":
+                types_ = value if isinstance(value, list) else [value]
+                if any(t not in TYPE_CHECKS for t in types_):
+                    raise UnsupportedSchemaError(f"Unsupported type in {types_!r}")
+                check = " or ".join(TYPE_CHECKS[t].format(v=var) for t in types_)
+                reprs = ", ".join(repr(t) for t in types_)
+                lines.append(f"{indent}if not ({check}):")
+                lines.append(error("type", message(f" is not of type {reprs}")))
+
+            elif keyword == "enum":
+                if not all(e is None or isinstance(e, str) for e in value):
+                    raise UnsupportedSchemaError("Only string/null enums are supported")
+                strings = sorted(e for e in value if e is not None)
+                string_set = "{" + ", ".join(repr(e) for e in strings) + "}"
+                check = f"(isinstance({var}, str) and {var} in {string_set})"
+                if not strings:
+                    check = "False"
+                if None in value:
+                    check = f"{var} is None or {check}"
+                lines.append(f"{indent}if not ({check}):")
+                lines.append(error("enum", message(f" is not one of {value!r}")))
+
+            elif keyword in ("minLength", "maxLength", "minItems", "maxItems"):
+                kind = "str" if keyword.endswith("Length") else "list"
+                cmp = "<" if keyword.startswith("min") else ">"
+                if keyword.startswith("min"):
+                    text = "should be non-empty" if value == 1 else "is too short"
+                else:
+                    text = "is expected to be empty" if value == 0 else "is too long"
+                lines.append(
+                    f"{indent}if isinstance({var}, {kind}) and len({var}) {cmp} {value!r}:"
+                )
+                lines.append(error(keyword, message(f" {text}")))
+
+            elif keyword in ("minimum", "maximum"):
+                exclusive = schema.get(
+                    "exclusiveMinimum" if keyword == "minimum" else "exclusiveMaximum",
+                    False,
+                )
+                if keyword == "minimum":
+                    cmp = "<=" if exclusive else "<"
+                    text = "less than or equal to" if exclusive else "less than"
+                else:
+                    cmp = ">=" if exclusive else ">"
+                    text = "greater than or equal to" if exclusive else "greater than"
+                number_check = TYPE_CHECKS["number"].format(v=var)
+                lines.append(f"{indent}if {number_check} and {var} {cmp} {value!r}:")
+                lines.append(error(keyword, message(f" is {text} the {keyword} of {value!r}")))
+
+            elif keyword in ("exclusiveMinimum", "exclusiveMaximum"):
+                # Handled alongside minimum / maximum (draft 4 boolean form)
+                if not isinstance(value, bool):
+                    raise UnsupportedSchemaError(f"Non-boolean {keyword}")
+
+            elif keyword == "required":
+                lines.append(f"{indent}if isinstance({var}, dict):")
+                for prop in value:
+                    lines.append(f"{indent}    if {prop!r} not in {var}:")
+                    lines.append(
+                        "    " + error("required", repr(f"{prop!r} is a required property"))
+                    )
+
+            elif keyword == "properties":
+                prop_lines = []
+                for prop, subschema in value.items():
+                    sub_var = self._new_variable()
+                    sub_lines = self._compile_node(
+                        subschema, sub_var, rel_path + (prop,), depth + 2
+                    )
+                    if not sub_lines:
+                        continue
+                    prop_lines.append(f"{indent}    if {prop!r} in {var}:")
+                    prop_lines.append(f"{indent}        {sub_var} = {var}[{prop!r}]")
+                    prop_lines.extend(sub_lines)
+                if prop_lines:
+                    lines.append(f"{indent}if isinstance({var}, dict):")
+                    lines.extend(prop_lines)
+
+            elif keyword == "items":
+                lines.append(f"{indent}if isinstance({var}, list):")
+                if isinstance(value, dict):
+                    func = self._compile_function(value)
+                    lines.append(f"{indent}    for index, item in enumerate({var}):")
+                    lines.append(
+                        f"{indent}        {func}(item, {path_expr} + (index,), errors)"
+                    )
+                else:
+                    for index, subschema in enumerate(value):
+                        func = self._compile_function(subschema)
+                        lines.append(f"{indent}    if len({var}) > {index}:")
+                        lines.append(
+                            f"{indent}        {func}({var}[{index}], "
+                            f"{path_expr} + ({index},), errors)"
+                        )
+
+            elif keyword == "oneOf":
+                funcs = [self._compile_function(subschema) for subschema in value]
+                reprs = [repr(subschema) for subschema in value]
+                lines.append(f"{indent}valid_indexes = []")
+                lines.append(f"{indent}for index, func in enumerate(({', '.join(funcs)},)):")
+                lines.append(f"{indent}    branch_errors = []")
+                lines.append(f"{indent}    func({var}, (), branch_errors)")
+                lines.append(f"{indent}    if not branch_errors:")
+                lines.append(f"{indent}        valid_indexes.append(index)")
+                lines.append(f"{indent}if not valid_indexes:")
+                lines.append(
+                    error("oneOf", message(" is not valid under any of the given schemas"))
+                )
+                lines.append(f"{indent}elif len(valid_indexes) > 1:")
+                lines.append(f"{indent}    schema_reprs = {reprs!r}")
+                lines.append(
+                    f"{indent}    ordered = valid_indexes[1:] + valid_indexes[:1]"
+                )
+                lines.append(
+                    f"{indent}    joined = ', '.join(schema_reprs[i] for i in ordered)"
+                )
+                lines.append(error("oneOf", message(" is valid under each of ") + " + joined"))
+
+            else:
+                raise UnsupportedSchemaError(f"Keyword '{keyword}' is not supported")
+
+        return lines
+
+
+def generate_validator_source(schema):
+    """
+    Compiles a JSON schema into the source code of a standalone Python module that
+    performs the type, length, enum, min/max, required, items and oneOf checks
+    directly, reporting the same error paths (and messages) as jsonschema.
+
+    Args:
+        schema (dict): draft 4 JSON schema.
+
+    Returns:
+        str: Python source code for the module.
+
+    Raises:
+        UnsupportedSchemaError: if the schema uses keywords the generator does not handle.
+    """
+    root, functions = _SchemaCompiler(schema).compile()
+    return (
+        MODULE_HEADER.format(fingerprint=schema_fingerprint(schema))
+        + "\n\n"
+        + functions
+        + "\n"
+        + MODULE_FOOTER.format(root=root)
+    )
+
+
+class CompiledSchemaValidator:
+    """
+    Wraps a generated validator module with the subset of the jsonschema validator
+    interface used in this repo ("iter_errors", "is_valid" and "validate").
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.fingerprint = module.SCHEMA_FINGERPRINT
+
+    def iter_errors(self, instance):
+        return self.module.iter_errors(instance)
+
+    def is_valid(self, instance):
+        return self.module.is_valid(instance)
+
+    def validate(self, instance):
+        for error in self.module.iter_errors(instance):
+            raise error
+
+
+_compiled_cache = {}
+_compiled_lock = threading.Lock()
+
+
+def load_compiled_validator(schema=None):
+    """
+    Returns a CompiledSchemaValidator for the provided schema (or the NP-MRD Exchange
+    schema if none is provided). For the exchange schema the generated module is kept
+    at "validation/compiled_schema_validator.py" and regenerated whenever its recorded
+    fingerprint no longer matches the schema file. Other schemas are compiled in memory.
+
+    Raises:
+        UnsupportedSchemaError: if the schema can not be compiled.
+    """
+    is_default_schema = schema is None
+    if is_default_schema:
+        validator = _compiled_cache.get(schema_file_path)
+        if validator is not None:
+            return validator
+        schema = load_schema(schema_file_path)
+
+    fingerprint = schema_fingerprint(schema)
+    validator = _compiled_cache.get(fingerprint)
+    if validator is not None:
+        return validator
+
+    with _compiled_lock:
+        validator = _compiled_cache.get(fingerprint)
+        if validator is None:
+            module = _import_generated_module(fingerprint)
+            if module is None:
+                source = generate_validator_source(schema)
+                if is_default_schema or fingerprint == schema_fingerprint(
+                    load_schema(schema_file_path)
+                ):
+                    _write_generated_module(source)
+                module = _module_from_source(source)
+            validator = CompiledSchemaValidator(module)
+            _compiled_cache[fingerprint] = validator
+        if is_default_schema:
+            _compiled_cache[schema_file_path] = validator
+    return validator
+
+
+def _import_generated_module(fingerprint):
+    """Import the generated module from disk if it exists and matches the fingerprint."""
+    if not os.path.exists(compiled_module_path):
+        return None
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "npmrd_compiled_schema_validator", compiled_module_path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except Exception:
+        return None
+    if getattr(module, "SCHEMA_FINGERPRINT", None) != fingerprint:
+        return None
+    return module
+
+
+def _write_generated_module(source):
+    """Atomically replace the generated module. Read-only installs skip this step."""
+    tmp_path = f"{compiled_module_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            file.write(source)
+        os.replace(tmp_path, compiled_module_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _module_from_source(source):
+    module = types.ModuleType("npmrd_compiled_schema_validator")
+    module.__file__ = compiled_module_path
+    exec(compile(source, compiled_module_path, "exec"), module.__dict__)
+    return module
+
+
+if __name__ == "__main__":
+    # Run with "python -m validation.schema_codegen [schema.json]"
+    # Regenerate the module for the exchange schema (or a schema path given as an argument)
+    if len(sys.argv) > 1:
+        print(generate_validator_source(load_schema(sys.argv[1])))
+    else:
+        _write_generated_module(generate_validator_source(load_schema(schema_file_path)))
+        print(f"Wrote {compiled_module_path}")
@@ -0,0 +1,140 @@
+import sys
+import json
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    from .. import json_io
+except ImportError:
+    # Imported with the repo root on sys.path
+    import json_io
+
+current_dir = os.path.dirname(__file__)
+one_level_up = os.path.dirname(current_dir)
+schema_file_path = os.path.join(
+    one_level_up, "json_schema", "npmrd-exchange_schema.json"
+)
+
+# Validators are keyed by the sha256 of the schema content so that every caller
+# holding an equal schema (loaded separately or not) shares a single instance.
+_validator_cache = {}
+# Remembers the fingerprint of the schema dicts seen most recently (id -> (schema,
+# fingerprint)) so repeat callers passing the same object do not re-serialize it on
+# every call. Bounded, as each entry keeps its schema alive.
+_fingerprint_cache = OrderedDict()
+FINGERPRINT_CACHE_SIZE = 16
+_cache_lock = threading.Lock()
+_default_schema = None
+
+
+def load_schema(file_path=schema_file_path):
+    """Load the NP-MRD Exchange JSON schema from disk."""
+    return json_io.load_file(file_path)
+
+
+def schema_fingerprint(schema):
+    """
+    Returns a sha256 hex digest of the schema content. Key order does not affect
+    the result so that equal schemas always share a fingerprint.
+    """
+    with _cache_lock:
+        cached = _fingerprint_cache.get(id(schema))
+        if cached is not None and cached[0] is schema:
+            _fingerprint_cache.move_to_end(id(schema))
+            return cached[1]
+
+    # Always encoded with the standard library so the fingerprint (saved in the generated
+    # validator module) does not depend on the JSON backend installed
+    schema_bytes = json.dumps(
+        schema, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+    fingerprint = hashlib.sha256(schema_bytes).hexdigest()
+    with _cache_lock:
+        # Hold a reference to the schema so its id cannot be reused while cached
+        _fingerprint_cache[id(schema)] = (schema, fingerprint)
+        _fingerprint_cache.move_to_end(id(schema))
+        while len(_fingerprint_cache) > FINGERPRINT_CACHE_SIZE:
+            _fingerprint_cache.popitem(last=False)
+    return fingerprint
+
+
+def get_schema_validator(schema=None, compiled=False):
+    """
+    Returns a jsonschema validator for the provided schema (or the NP-MRD Exchange
+    schema if none is provided). The meta-schema check and validator construction
+    only happen the first time a given schema is seen; afterwards the same validator
+    object is returned to every caller. Schemas passed in are treated as read-only.
+
+    Args:
+        schema (dict): JSON schema to validate against. Defaults to the schema in
+        "json_schema/npmrd-exchange_schema.json".
+        compiled (bool): If True return the code-generated validator from
+        schema_codegen.py, falling back to jsonschema if the schema can not be compiled.
+
+    Returns:
+        jsonschema.protocols.Validator: validator supporting "validate", "is_valid"
+        and "iter_errors".
+
+    Raises:
+        jsonschema.exceptions.SchemaError: if the schema itself is invalid.
+    """
+    if compiled:
+        from .schema_codegen import load_compiled_validator, UnsupportedSchemaError
+
+        try:
+            return load_compiled_validator(schema)
+        except UnsupportedSchemaError:
+            pass
+
+    if schema is None:
+        schema = _get_default_schema()
+
+    fingerprint = schema_fingerprint(schema)
+    validator = _validator_cache.get(fingerprint)
+    if validator is not None:
+        return validator
+
+    # jsonschema is slow to import, so it is only loaded once a generic validator is needed
+    from jsonschema.validators import validator_for
+
+    with _cache_lock:
+        validator = _validator_cache.get(fingerprint)
+        if validator is None:
+            validator_class = validator_for(schema)
+            validator_class.check_schema(schema)
+            validator = validator_class(schema)
+            _validator_cache[fingerprint] = validator
+    return validator
+
+
+def iter_schema_errors(instance, schema=None):
+    """
+    Yields every schema violation in the provided instance in a single pass
+    (rather than stopping at the first one like jsonschema.validate).
+    """
+    return get_schema_validator(schema).iter_errors(instance)
+
+
+def is_schema_error(error):
+    """
+    True if error is a jsonschema SchemaError (raised for an invalid schema). Does not
+    import jsonschema if it has not been used.
+    """
+    exceptions = sys.modules.get("jsonschema.exceptions")
+    return exceptions is not None and isinstance(error, exceptions.SchemaError)
+
+
+def format_schema_error(error):
+    """Formats a jsonschema error as 'Path: a/b/0: <message>'."""
+    return f"Path: {'/'.join(str(p) for p in error.path)}: {error.message}"
+
+
+def _get_default_schema():
+    global _default_schema
+    if _default_schema is None:
+        with _cache_lock:
+            if _default_schema is None:
+                _default_schema = load_schema()
+    return _default_schema
@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+import json
+import copy
+import gc
+import weakref
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from validation import schema_validator
+from validation.schema_validator import get_schema_validator, iter_schema_errors, load_schema, schema_fingerprint
+from validation.schema_codegen import load_compiled_validator
+
+class TestSchemaValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_json_folder = os.path.join(os.path.dirname(__file__), 'test_jsons')
+        with open(os.path.join(self.test_json_folder, "article_json_1.json"), 'r') as file:
+            self.article_json_list = json.load(file)
+
+    def test_validator_is_shared_between_equal_schemas(self):
+        schema_a = load_schema()
+        schema_b = load_schema()
+        self.assertIs(get_schema_validator(schema_a), get_schema_validator(schema_b))
+        self.assertIs(get_schema_validator(), get_schema_validator(schema_a))
+
+    def test_fingerprint_cache_is_bounded(self):
+        class Schema(dict):
+            pass
+
+        first_schema = Schema({"type": "string"})
+        first_schema_ref = weakref.ref(first_schema)
+        fingerprint = schema_fingerprint(first_schema)
+        self.assertEqual(schema_fingerprint(Schema({"type": "string"})), fingerprint)
+        del first_schema
+
+        schemas = [Schema({"maxLength": length}) for length in range(schema_validator.FINGERPRINT_CACHE_SIZE + 1)]
+        fingerprints = [schema_fingerprint(schema) for schema in schemas]
+        self.assertEqual(len(set(fingerprints)), len(schemas))
+        self.assertLessEqual(len(schema_validator._fingerprint_cache), schema_validator.FINGERPRINT_CACHE_SIZE)
+
+        # Schemas pushed out of the cache are no longer kept alive by it
+        gc.collect()
+        self.assertIsNone(first_schema_ref())
+        self.assertEqual(schema_fingerprint(schemas[-1]), fingerprints[-1])
+
+    def test_all_errors_collected(self):
+        entry = copy.deepcopy(self.article_json_list[0])
+        baseline_paths = self.get_error_paths(entry)
+
+        entry["smiles"] = 5
+        entry["depositor_info"]["account_id"] = -1
+        del entry["citation"]
+
+        new_paths = self.get_error_paths(entry) - baseline_paths
+        self.assertEqual(new_paths, {"", "depositor_info/account_id", "smiles"})
+
+    def test_compiled_validator_matches_jsonschema(self):
+        generic_validator = get_schema_validator()
+        compiled_validator = load_compiled_validator()
+
+        broken_entry = copy.deepcopy(self.article_json_list[0])
+        broken_entry["smiles"] = None
+        broken_entry["submission"]["source"] = "unknown"
+        broken_entry["depositor_info"]["account_id"] = 1.5
+        broken_entry["nmr_data"]["peak_lists"][0]["values"] = [1.0, [2.0, "x"], None]
+        broken_entry["nmr_data"]["peak_lists"][0]["c_temperature"] = "288"
+        del broken_entry["origin"]
+
+        for entry in self.article_json_list + [broken_entry, [], "not an entry"]:
+            generic_errors = [
+                (list(error.path), error.validator, error.message)
+                for error in generic_validator.iter_errors(entry)
+            ]
+            compiled_errors = [
+                (list(error.path), error.validator, error.message)
+                for error in compiled_validator.iter_errors(entry)
+            ]
+            self.assertEqual(compiled_errors, generic_errors)
+            self.assertEqual(compiled_validator.is_valid(entry), generic_validator.is_valid(entry))
+
+    def get_error_paths(self, entry):
+        return {"/".join(str(p) for p in error.path) for error in iter_schema_errors(entry)}
+
+if __name__ == "__main__":
+    unittest.main()
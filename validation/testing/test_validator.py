@@ -1,10 +1,16 @@
 import unittest
 import os
 import sys
+import json
+import copy
+import subprocess
+import tempfile
+import threading
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from validation.validator import JSONValidator
+from validation.validator import JSONValidator, ValidatorEngine, validate_many, ERROR_CODES
+from validation.rulebook import ValidationRulebook
 
 class TestValidator(unittest.TestCase):
 
@@ -27,6 +33,122 @@ class TestValidator(unittest.TestCase):
     def test_peak_list_only_json_1(self):
         self.run_test_for_json_file(self.peak_list_only_json_1)
 
+    def test_run_as_script(self):
+        # Run by file path from another directory, as external callers do
+        script_path = os.path.join(os.path.dirname(__file__), '..', 'validator.py')
+        completed = subprocess.run(
+            [sys.executable, script_path, os.path.join(self.test_json_folder, self.article_json_1)],
+            cwd=tempfile.gettempdir(),
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertIn("All entries passed validation.", completed.stdout)
+
+    def test_rulebook_decision_table(self):
+        with open(os.path.join(self.test_json_folder, self.private_json_1), 'r') as file:
+            entries = json.load(file)
+        engine = ValidatorEngine()
+        deposition_rules = engine.rulebook.sources["deposition_system"]
+        for entry in entries:
+            self.assertIn(deposition_rules.get_plan(entry), deposition_rules.decision_table.values())
+
+        entry = copy.deepcopy(entries[0])
+        entry["origin"]["private_collection"]["compound_source_type"] = "commercial"
+        result = engine.validate(entry, legacy_message=True)
+        self.assertFalse(result["valid"])
+        self.assertEqual(
+            result["error_message"],
+            "origin.private_collection.commercial.supplier is not in json or is null. "
+            "origin.private_collection.commercial.cas_number is not in json or is null",
+        )
+
+    def test_rulebook_rules_for_new_source(self):
+        rulebook = ValidationRulebook({"sources": {
+            "dft_team": {
+                "required": ["smiles"],
+                "switch": [{"field": "submission.type", "cases": {"calculated": {"required": ["nmr_data.peak_lists"]}}}],
+            }
+        }})
+        engine = ValidatorEngine(rulebook=rulebook)
+        entry = {"smiles": "C", "submission": {"source": "dft_team", "type": "calculated"}}
+
+        self.assertEqual(engine.validate(entry)["errors"], [{
+            "code": "missing_field",
+            "field": "nmr_data.peak_lists",
+            "message": "nmr_data.peak_lists is not in json or is null",
+        }])
+        entry["submission"]["type"] = "other"
+        self.assertTrue(engine.validate(entry)["valid"])
+        entry["submission"]["source"] = "deposition_system"
+        self.assertEqual(engine.validate(entry)["errors"][0]["code"], "invalid_source")
+
+    def test_fail_fast_stops_at_first_error(self):
+        with open(os.path.join(self.test_json_folder, self.article_json_1), 'r') as file:
+            entry = json.load(file)[0]
+        entry["npmrd_id"] = "NP12"
+        del entry["smiles"]
+        del entry["depositor_info"]
+
+        engine = ValidatorEngine()
+        result = engine.validate(entry)
+        self.assertEqual(len(result["errors"]), 7)
+        self.assertNotIn("error_message", result)
+
+        fail_fast_result = engine.validate(entry, fail_fast=True)
+        self.assertFalse(fail_fast_result["valid"])
+        self.assertEqual(fail_fast_result["errors"], result["errors"][:1])
+
+        # Every error carries one of the documented codes
+        entry["submission"]["source"] = "unknown"
+        errors = result["errors"] + engine.validate(entry)["errors"]
+        self.assertEqual(
+            {error["code"] for error in errors},
+            {"invalid_npmrd_id", "missing_field", "invalid_source"},
+        )
+        self.assertTrue({error["code"] for error in errors} <= set(ERROR_CODES))
+
+    def test_validate_many_keeps_order_and_isolates_errors(self):
+        entries = []
+        for json_file in [self.article_json_1, self.private_json_1]:
+            with open(os.path.join(self.test_json_folder, json_file), 'r') as file:
+                entries += json.load(file)
+        broken_entry = copy.deepcopy(entries[0])
+        del broken_entry["smiles"]
+        entries += [broken_entry, "not an entry"]
+
+        results, summary = validate_many(entries, workers=2, chunksize=2)
+        serial_results = JSONValidator(entries[:-1]).validate()
+
+        self.assertEqual([result["index"] for result in results], list(range(len(entries))))
+        for result, serial_result in zip(results, serial_results):
+            self.assertEqual(result["valid"], serial_result["valid"])
+            self.assertEqual(result["errors"], serial_result["errors"])
+        self.assertEqual(results[-1]["errors"][0]["code"], "validation_exception")
+        self.assertEqual(summary["total"], len(entries))
+        self.assertEqual(summary["invalid"], 2)
+        self.assertEqual(summary["errors_by_code"], {"missing_field": 1, "validation_exception": 1})
+        self.assertEqual(summary["errors_by_field"], {"smiles": 1})
+
+    def test_validate_many_threads_keep_their_own_engine(self):
+        strict_engine = ValidatorEngine(rulebook=ValidationRulebook({"sources": {"dft_team": {"required": ["smiles"]}}}))
+        lenient_engine = ValidatorEngine(rulebook=ValidationRulebook({"sources": {"dft_team": {}}}))
+        entries = [{"submission": {"source": "dft_team"}}] * 20
+        outcomes = {strict_engine: [], lenient_engine: []}
+
+        def run(engine):
+            for _ in range(200):
+                results, _ = validate_many(entries, workers=1, engine=engine)
+                outcomes[engine].extend(result["valid"] for result in results)
+
+        threads = [threading.Thread(target=run, args=(engine,)) for engine in outcomes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(set(outcomes[strict_engine]), {False})
+        self.assertEqual(set(outcomes[lenient_engine]), {True})
+
     def run_test_for_json_file(self, json_file):
         json_file_path = os.path.join(self.test_json_folder, json_file)
         validator = JSONValidator(json_file_path)
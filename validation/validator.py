@@ -1,12 +1,75 @@
 import sys
-import json
+import os
 import re
-
-
-class JSONValidator:
-    def __init__(self, json_data):
-        self.json_data = json_data
-        self.results = []
+import threading
+import traceback
+from collections import Counter
+
+try:
+    from .. import json_io
+except ImportError:
+    try:
+        # Imported with the repo root on sys.path (i.e. "python -m validation.validator")
+        import json_io
+    except ImportError:
+        # Run directly as a script ("python validation/validator.py")
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import json_io
+
+try:
+    from .rulebook import (
+        get_default_rulebook,
+        compile_field_checks,
+        resolve_field_path,
+    )
+except ImportError:
+    # Run directly as a script ("python validation/validator.py")
+    from rulebook import (
+        get_default_rulebook,
+        compile_field_checks,
+        resolve_field_path,
+    )
+
+
+# Codes used in the "errors" records of a validation result
+ERROR_CODES = {
+    "invalid_npmrd_id": "npmrd_id is not of the form NP0000000",
+    "invalid_source": "submission.source has no validation rules",
+    "missing_field": "a required field is not in the json or is null",
+    "validation_exception": "validation of the entry raised an exception",
+}
+
+# Entries sent to a worker process at a time by validate_many
+DEFAULT_CHUNKSIZE = 256
+
+
+def format_error_message(errors):
+    """
+    Joins the messages of a list of error records into the single "error_message"
+    string returned by older versions (None if there are no errors).
+    """
+    if not errors:
+        return None
+    return ". ".join(error["message"] for error in errors)
+
+
+class ValidatorEngine:
+    """
+    Stateless validation engine. Every check receives the entry and its result
+    dictionary explicitly, so one engine can validate any number of entries and be
+    shared between threads.
+
+    The required fields of each submission.source come from the validation rulebook
+    (see rulebook.py), which is compiled into a decision table per source when loaded,
+    so validating an entry only runs a prebuilt list of field lookups.
+
+    Example usage
+        engine = ValidatorEngine()
+        result = engine.validate(entry)
+    """
+
+    def __init__(self, rulebook=None):
+        self.rulebook = get_default_rulebook() if rulebook is None else rulebook
 
     def _check_if_entry_is_valid(self, result):
         """
@@ -17,19 +80,16 @@ class JSONValidator:
             result["valid"] = True
         return result
 
-    def _fail_entry(self, result, error_message):
+    def _fail_entry(self, result, error_message, code, field=None):
         """
-        Causes a provided result dictionary to be set to false and appends the provided
-        error_message to the result's "error_message" value.
+        Causes a provided result dictionary to be set to false and appends an error
+        record with the provided error_message and code (one of ERROR_CODES) to the
+        result's "errors" list.
         """
         result["valid"] = False
-        if type(result["error_message"]) == str:
-            result["error_message"] = (
-                result["error_message"] + ". " + error_message
-            )
-        else:
-            result["error_message"] = error_message
-
+        result["errors"].append(
+            {"code": code, "field": field, "message": error_message}
+        )
         return result
 
     def _confirm_non_null_fields(self, json_data, result, field_names):
@@ -51,148 +111,46 @@ class JSONValidator:
             dict: dictionary status report for the compound json_data passed into it (see
             validate returns for details).
         """
-        for field_name in field_names:
-            # Split "|" statement in case we are looking for one of x fields
-            field_one_ofs = field_name.split("|")
-            num_fails = 0
-            fail_threshold = len(field_one_ofs)
-            for one_of in field_one_ofs:
-                # Now traverse nested entries specified in field name
-                current_data = json_data
-                field_parts = one_of.split(".")
-                for part in field_parts:
-                    if part in current_data and current_data[part] != None:
-                        current_data = current_data[part]
-                    else:
-                        num_fails += 1
-                        if num_fails == fail_threshold:
-                            error_message = (
-                                field_name + " is not in json or is null"
-                            )
-                            result = self._fail_entry(result, error_message)
-
-        return result
+        return self._run_field_checks(
+            json_data, result, compile_field_checks(tuple(field_names))
+        )
 
-    def _check_deposition_system(self, json_data, result):
+    def _run_field_checks(self, json_data, result, field_checks, fail_fast=False):
         """
-        Runs validation steps necessary for a compound with the submission.source "deposition_system"
+        Run a tuple of compiled FieldCheck against json_data, failing result for each miss
+        (or only the first one if fail_fast is True).
         """
-        if json_data["submission"]["source"] != "deposition_system":
-            self._fail_entry(
-                result,
-                "Invalid source for deposition_system: "
-                + json_data["submission"]["source"],
-            )
-
-        always_non_null = [
-            "smiles",
-            "inchikey",
-            "submission.type",
-            "submission.uuid",
-            "submission.compound_uuid",
-            "submission.submission_date",
-            "submission.embargo_status",
-            "depositor_info.email",
-            "depositor_info.show_email_in_attribution",
-            "depositor_info.show_name_in_attribution",
-            "depositor_info.show_organization_in_attribution",
-            "depositor_info.account_id",
-        ]
-        result = self._confirm_non_null_fields(
-            json_data, result, always_non_null
-        )
-
-        # Ensure published article has necessary fields
-        if json_data["submission"]["type"] == "published_article":
-            non_null_citation = ["citation.doi|citation.pmid|citation.pii"]
-            result = self._confirm_non_null_fields(
-                json_data, result, non_null_citation
-            )
-        elif json_data["submission"]["type"] == "presubmission_article":
-            pass
-        elif json_data["submission"]["type"] == "private_deposition":
-            non_null_compound_source = [
-                "origin.private_collection.compound_source_type"
-            ]
-            result = self._confirm_non_null_fields(
-                json_data, result, non_null_compound_source
-            )
-            compound_source_type = (
-                json_data.get("origin", {})
-                .get("private_collection", {})
-                .get("compound_source_type", "")
-            )
-            if compound_source_type == "purified_in_house":
-                non_null_purified_in_house = [
-                    "compound_name",
-                    "origin.species",
-                    "origin.genus",
-                ]
-                result = self._confirm_non_null_fields(
-                    json_data, result, non_null_purified_in_house
-                )
-            elif compound_source_type == "commercial":
-                non_null_commerical = [
-                    "origin.private_collection.commercial.supplier",
-                    "origin.private_collection.commercial.cas_number",
-                ]
-                result = self._confirm_non_null_fields(
-                    json_data, result, non_null_commerical
-                )
-            elif compound_source_type == "compound_library":
-                non_null_compound_library = [
-                    "origin.private_collection.compound_library.library_name"
-                ]
-                result = self._confirm_non_null_fields(
-                    json_data, result, non_null_compound_library
-                )
-            elif compound_source_type == "other":
-                non_null_other = [
-                    "origin.private_collection.other.user_specified_compound_source",
-                    "compound_name",
-                    "origin.species",
-                    "origin.genus",
-                ]
-                result = self._confirm_non_null_fields(
-                    json_data, result, non_null_other
+        for field_check in field_checks:
+            if not field_check.is_satisfied(json_data):
+                self._fail_entry(
+                    result,
+                    field_check.error_message,
+                    code="missing_field",
+                    field=field_check.field_name,
                 )
+                if fail_fast:
+                    break
+        return result
 
-        if json_data["submission"]["embargo_status"] == "publish":
-            pass
-        elif json_data["submission"]["embargo_status"] == "embargo_until_date":
-            non_null_embargo_date = ["submission.embargo_date"]
-            result = self._confirm_non_null_fields(
-                json_data, result, non_null_embargo_date
-            )
-        elif (
-            json_data["submission"]["embargo_status"]
-            == "embargo_until_publication"
-        ):
-            pass
-
-        if json_data["depositor_info"]["show_name_in_attribution"] == True:
-            result = self._confirm_non_null_fields(
-                json_data, result, ["depositor_info.attribution_name"]
-            )
-        if (
-            json_data["depositor_info"]["show_organization_in_attribution"]
-            == True
-        ):
-            result = self._confirm_non_null_fields(
-                json_data, result, ["depositor_info.attribution_organization"]
-            )
-
-        # If test has not failed then pass back positive result
-        return self._check_if_entry_is_valid(result)
-
-    def _check_dft_team(self, json_data, result):
+    def _check_source_rules(self, json_data, result, source_rules, fail_fast=False):
         """
-        Runs validation steps necessary for a compound with the submission.source "dft_team"
+        Runs the checks the rulebook lists for the submission.source of the compound.
         """
+        plan = source_rules.get_plan(json_data)
+        self._run_field_checks(json_data, result, plan.field_checks, fail_fast)
 
+        # Fields only required when a flag (i.e. depositor_info.show_name_in_attribution)
+        # is set to True
+        for flag_path, field_checks in plan.conditional_field_checks:
+            if fail_fast and result["valid"] == False:
+                break
+            if resolve_field_path(json_data, flag_path) == True:
+                self._run_field_checks(json_data, result, field_checks, fail_fast)
+
+        # If test has not failed then pass back positive result
         return self._check_if_entry_is_valid(result)
 
-    def _check_wrapper(self, json_data):
+    def _check_wrapper(self, json_data, fail_fast=False):
         """
         Validates that a valid submission.source exists in the json for an individual
         compound. Then runs an additional check script to validate the json depending
@@ -200,6 +158,7 @@ class JSONValidator:
 
         Args:
             json_data (dict): json for individual compound in the NP-MRD Exchange json format.
+            fail_fast (bool): stop at the first error.
 
         Returns:
             dict: dictionary status report for the compound json passed into it (see
@@ -207,7 +166,7 @@ class JSONValidator:
         """
         result = {
             "valid": None,
-            "error_message": None,
+            "errors": [],
         }
 
         source = json_data.get("submission", {}).get("source", {})
@@ -216,19 +175,228 @@ class JSONValidator:
         npmrd_id_value = json_data.get("npmrd_id", {})
         if npmrd_id_value:
             if not bool(re.match(r"^NP\d{7}$", npmrd_id_value)):
-                self._fail_entry(result, f"Invalid NP-MRD ID'{npmrd_id_value}'")
+                self._fail_entry(
+                    result,
+                    f"Invalid NP-MRD ID'{npmrd_id_value}'",
+                    code="invalid_npmrd_id",
+                    field="npmrd_id",
+                )
+                if fail_fast:
+                    return result
 
-        if source == "deposition_system":
-            return self._check_deposition_system(json_data, result)
-        elif source == "dft_team":
-            return self._check_dft_team(json_data, result)
+        source_rules = (
+            self.rulebook.sources.get(source) if isinstance(source, str) else None
+        )
+        if source_rules is not None:
+            return self._check_source_rules(json_data, result, source_rules, fail_fast)
         else:
-            return self._fail_entry(result, f"Invalid source: '{source}'")
+            return self._fail_entry(
+                result,
+                f"Invalid source: '{source}'",
+                code="invalid_source",
+                field="submission.source",
+            )
+
+    def validate(self, json_data, fail_fast=False, legacy_message=False):
+        """
+        Validate the json for an individual compound.
+
+        Args:
+            json_data (dict): json for individual compound in the NP-MRD Exchange json format.
+            fail_fast (bool): stop at the first error, for callers that only need "valid".
+            legacy_message (bool): also add the errors joined into a single
+                "error_message" string (None if valid), as returned by older versions.
+
+        Returns:
+            dict: status report for the compound with the fields...
+                valid (bool): whether or not that compound was found to be valid
+                errors (list): one dictionary per problem found with the fields
+                    code (str): one of ERROR_CODES
+                    field (str): the field path the error refers to
+                    message (str): human readable description
+                error_message (str): only if legacy_message is True.
+        """
+        result = self._check_wrapper(json_data, fail_fast)
+        if legacy_message:
+            result["error_message"] = format_error_message(result["errors"])
+        return result
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_engine():
+    """Returns the process-wide ValidatorEngine."""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = ValidatorEngine()
+    return _default_engine
+
+
+def describe_entry(index, entry):
+    """Returns the identifying fields reported for each entry of a list of compounds."""
+    if not isinstance(entry, dict):
+        return {"index": index, "inchikey": None, "source": None, "type": None}
+    submission = entry.get("submission") or {}
+    return {
+        "index": index,
+        "inchikey": entry.get("inchikey"),
+        "source": submission.get("source"),
+        "type": submission.get("type"),
+    }
+
+
+def _validate_isolated(engine, entry, fail_fast, legacy_message):
+    """
+    engine.validate(entry), but an exception raised while validating is turned into a
+    "validation_exception" error for that entry instead of aborting the batch.
+    """
+    try:
+        return engine.validate(entry, fail_fast, legacy_message)
+    except Exception as e:
+        errors = [
+            {
+                "code": "validation_exception",
+                "field": None,
+                "message": f"{type(e).__name__}: {e}",
+            }
+        ]
+        result = {"valid": False, "errors": errors, "traceback": traceback.format_exc()}
+        if legacy_message:
+            result["error_message"] = format_error_message(errors)
+        return result
+
+
+# Engine used by validate_many worker processes, set once per worker by _init_worker
+_worker_engine = None
+
+
+def _init_worker(engine):
+    global _worker_engine
+    _worker_engine = get_default_engine() if engine is None else engine
+
+
+def _validate_in_worker(task):
+    index, entry, fail_fast, legacy_message = task
+    result = describe_entry(index, entry)
+    result.update(_validate_isolated(_worker_engine, entry, fail_fast, legacy_message))
+    return result
+
+
+def summarize_results(results):
+    """
+    Aggregate a list of validation results into counts.
+
+    Returns:
+        dict: with the fields...
+            total (int): number of entries
+            valid (int): number of valid entries
+            invalid (int): number of invalid entries
+            errors_by_code (dict): number of errors per error code (see ERROR_CODES)
+            errors_by_field (dict): number of errors per field path
+    """
+    errors_by_code = Counter()
+    errors_by_field = Counter()
+    valid = 0
+    for result in results:
+        if result["valid"]:
+            valid += 1
+        for error in result["errors"]:
+            errors_by_code[error["code"]] += 1
+            if error["field"] is not None:
+                errors_by_field[error["field"]] += 1
+    return {
+        "total": len(results),
+        "valid": valid,
+        "invalid": len(results) - valid,
+        "errors_by_code": dict(errors_by_code),
+        "errors_by_field": dict(errors_by_field),
+    }
+
+
+def validate_many(
+    json_list,
+    workers=None,
+    chunksize=DEFAULT_CHUNKSIZE,
+    engine=None,
+    fail_fast=False,
+    legacy_message=False,
+):
+    """
+    Validate a list of compound entries, fanning them out over a pool of worker
+    processes. Each worker builds (or receives) its engine once and validates
+    "chunksize" entries per task.
+
+    Args:
+        json_list (list): compound dictionaries (a full NP-MRD Exchange JSON).
+        workers (int): number of worker processes, every core by default. With 1 (or
+            fewer entries than a single chunk) the entries are validated in this process.
+        chunksize (int): number of entries sent to a worker at a time.
+        engine (ValidatorEngine): engine to use, the default engine if None.
+        fail_fast (bool): stop at the first error of each entry.
+        legacy_message (bool): also add "error_message" to every result.
+
+    Returns:
+        tuple: (results, summary) where results holds one dictionary per entry in the
+        original order (see JSONValidator.validate) and summary is the output of
+        summarize_results. An entry whose validation raises is reported as invalid
+        with a "validation_exception" error without affecting the others.
+
+    Example usage
+        results, summary = validate_many(json_list, workers=16)
+        print(summary["errors_by_code"])
+    """
+    tasks = [
+        (index, entry, fail_fast, legacy_message)
+        for index, entry in enumerate(json_list)
+    ]
+    if workers == 1 or len(tasks) <= chunksize:
+        # Validated in this process with a local engine (_worker_engine is only set in
+        # the worker processes) so concurrent calls can not use each other's engine
+        engine = get_default_engine() if engine is None else engine
+        results = []
+        for index, entry, fail_fast, legacy_message in tasks:
+            result = describe_entry(index, entry)
+            result.update(_validate_isolated(engine, entry, fail_fast, legacy_message))
+            results.append(result)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(engine,)
+        ) as executor:
+            results = list(
+                executor.map(_validate_in_worker, tasks, chunksize=chunksize)
+            )
+    return results, summarize_results(results)
+
+
+class JSONValidator:
+    """
+    Thin wrapper around ValidatorEngine that keeps the original one-object-per-run
+    interface. json_data may be a single compound dictionary, a list of them (a full
+    NP-MRD Exchange JSON) or the path to an NP-MRD Exchange JSON file.
+
+    Results include both the structured "errors" and the legacy "error_message" string
+    unless legacy_message is False.
+    """
+
+    def __init__(self, json_data, engine=None, fail_fast=False, legacy_message=True):
+        self.json_data = json_data
+        self.engine = get_default_engine() if engine is None else engine
+        self.fail_fast = fail_fast
+        self.legacy_message = legacy_message
+        self.results = []
+        self.summary = None
 
     def validate(self):
         """
         Used to run the validation of an NP-MRD Exchange JSON. Returns a list of
-        dictionaries with the results of the validation.
+        dictionaries with the results of the validation (or a single result dictionary
+        with only "valid", "errors" and "error_message" if a single compound was provided).
 
         Returns:
             list: Returns a list of dictionaries, each acting as a status
@@ -239,6 +407,8 @@ class JSONValidator:
                 source (str): the "submission.source" value in the input json
                 type (str): the "submission.type" value in the json
                 valid (bool): whether or not that compound was found to be valid
+                errors (list): error records (code, field, message), see
+                ValidatorEngine.validate
                 error_message (str): if the compound is not valid this will include
                 message as to why.
 
@@ -250,6 +420,7 @@ class JSONValidator:
                     'source': 'deposition_system',
                     'type': 'published_article',
                     'valid': True,
+                    'errors': [],
                     'error_message': None
                 },
                 {
@@ -257,18 +428,62 @@ class JSONValidator:
                     'inchikey': 'PRMUPNPVIWOFLN-UHFFFAOYSA-N',
                     'source': 'deposition_system',
                     'type': 'published_article',
-                    'valid': True,
-                    'error_message': None
+                    'valid': False,
+                    'errors': [
+                        {
+                            'code': 'missing_field',
+                            'field': 'citation.doi|citation.pmid|citation.pii',
+                            'message': 'citation.doi|citation.pmid|citation.pii is not in json or is null'
+                        }
+                    ],
+                    'error_message': 'citation.doi|citation.pmid|citation.pii is not in json or is null'
                 }
             ]
         """
-        # try:
-        validation_result = self._check_wrapper(self.json_data)
+        json_data = self._load_json_data()
 
-        return validation_result
+        if isinstance(json_data, dict):
+            self.results = self.engine.validate(
+                json_data, self.fail_fast, self.legacy_message
+            )
+            return self.results
+
+        self.results = []
+        for index, entry in enumerate(json_data):
+            result = describe_entry(index, entry)
+            result.update(
+                self.engine.validate(entry, self.fail_fast, self.legacy_message)
+            )
+            self.results.append(result)
+        return self.results
+
+    def validate_many(self, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Same results as validate() for a list of compounds, but computed over a pool of
+        worker processes (see validate_many) with errors isolated per entry. The
+        aggregated counts are stored in self.summary.
+
+        Returns:
+            list: one result dictionary per compound, in the input order.
+        """
+        json_data = self._load_json_data()
+        if isinstance(json_data, dict):
+            json_data = [json_data]
+        self.results, self.summary = validate_many(
+            json_data,
+            workers=workers,
+            chunksize=chunksize,
+            # The default engine is rebuilt in each worker rather than pickled
+            engine=None if self.engine is get_default_engine() else self.engine,
+            fail_fast=self.fail_fast,
+            legacy_message=self.legacy_message,
+        )
+        return self.results
 
-        # except Exception as e:
-        #     print(f"An error occurred: {str(e)}")
+    def _load_json_data(self):
+        if isinstance(self.json_data, str):
+            return json_io.load_file(self.json_data)
+        return self.json_data
 
 
 if __name__ == "__main__":
@@ -278,16 +493,15 @@ if __name__ == "__main__":
         json_file_path = sys.argv[1]
 
         try:
-            with open(json_file_path, "r") as file:
-                json_data = json.load(file)
+            json_data = json_io.load_file(json_file_path)
         except FileNotFoundError:
             print(f"File not found: {json_file_path}")
-        except json.JSONDecodeError:
+        except json_io.JSONDecodeError:
             print(f"Invalid JSON in file: {json_file_path}")
 
         validator = JSONValidator(json_file_path)
 
-        if validator.validate():
+        if all(result["valid"] for result in validator.validate()):
             print("All entries passed validation.")
         else:
             print("Some entries failed validation.")